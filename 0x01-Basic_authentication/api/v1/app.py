@@ -6,6 +6,7 @@ from os import getenv
 from api.v1.views import app_views
 from flask import Flask, jsonify, abort, request
 from flask_cors import (CORS, cross_origin)
+from api.v1.auth.auth import PathMatcher
 import os
 
 
@@ -44,14 +45,16 @@ def forbidden_access(error) -> str:
     return jsonify({"error": "Forbidden"}), 403
 
 
+EXCLUDED_PATHS = PathMatcher(['/api/v1/status/',
+                              '/api/v1/unauthorized/',
+                              '/api/v1/forbidden/'])
+
+
 @app.before_request
 def request_filter() -> None:
     """Method that checks and filters each request"""
-    excluded_paths = ['/api/v1/status/',
-                      '/api/v1/unauthorized/',
-                      '/api/v1/forbidden/']
     if auth:
-        if auth.require_auth(request.path, excluded_paths):
+        if auth.require_auth(request.path, EXCLUDED_PATHS):
             if auth.authorization_header(request) is None:
                 abort(401)
             if auth.current_user(request) is None:
@@ -6,25 +6,86 @@ from typing import List, TypeVar
 User = TypeVar('User')
 
 
+class PathMatcher:
+    """
+    Excluded path patterns compiled once: exact paths (slash tolerant)
+    go in a set, wildcard patterns ("/api/v1/stat*") in a prefix trie,
+    so matching a path costs O(len(path)) whatever the number of patterns.
+    """
+    _END = None
+
+    def __init__(self, patterns: List[str]):
+        """ Compile the patterns """
+        self._exact = set()
+        self._prefixes = {}
+        self._size = 0
+        for pattern in patterns:
+            self.add(pattern)
+
+    @staticmethod
+    def _normalize(path: str) -> str:
+        """ Path with exactly one trailing slash """
+        return path if path.endswith('/') else path + '/'
+
+    def add(self, pattern: str):
+        """ Add one pattern """
+        self._size += 1
+        if not pattern.endswith('*'):
+            self._exact.add(self._normalize(pattern))
+            return
+        node = self._prefixes
+        for char in pattern[:-1]:
+            node = node.setdefault(char, {})
+        node[self._END] = True
+
+    def match(self, path: str) -> bool:
+        """ Whether path matches one of the patterns """
+        if self._normalize(path) in self._exact:
+            return True
+        node = self._prefixes
+        if self._END in node:
+            return True
+        for char in path:
+            node = node.get(char)
+            if node is None:
+                return False
+            if self._END in node:
+                return True
+        return False
+
+    def __len__(self) -> int:
+        """ Number of patterns """
+        return self._size
+
+
 class Auth:
     """
     A class for handling user authentication and authorization.
     """
+
     def require_auth(self, path: str, excluded_paths: List[str]) -> bool:
         """ Determine whether the given request path requires authentication.
+
+        excluded_paths is either a PathMatcher built at startup or a list
+        of patterns, compiled on first use
         """
         if path is None:
             return True
         if not excluded_paths:
             return True
-        for pattern in excluded_paths:
-            if pattern.endswith('*'):
-                if path.startswith(pattern[:-1]):
-                    return False
-            elif pattern == path or pattern == f'{path}/':
-                return False
+        if not isinstance(excluded_paths, PathMatcher):
+            excluded_paths = self._path_matcher(excluded_paths)
+
+        return not excluded_paths.match(path)
 
-        return True
+    def _path_matcher(self, excluded_paths: List[str]) -> PathMatcher:
+        """ PathMatcher of a list of patterns, compiled once per list """
+        key = tuple(excluded_paths)
+        matchers = self.__dict__.setdefault('_path_matchers', {})
+        matcher = matchers.get(key)
+        if matcher is None:
+            matcher = matchers[key] = PathMatcher(excluded_paths)
+        return matcher
 
     def authorization_header(self, request=None) -> str:
         """  Validate all requests to secure the API
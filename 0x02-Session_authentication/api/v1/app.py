@@ -4,8 +4,9 @@ Route module for the API
 """
 from os import getenv
 from api.v1.views import app_views
-from flask import Flask, jsonify, abort, request
+from flask import Flask, jsonify, abort, request, g
 from flask_cors import (CORS, cross_origin)
+from api.v1.auth.auth import PathMatcher
 import os
 
 
@@ -15,6 +16,7 @@ CORS(app, resources={r"/api/v1/*": {"origins": "*"}})
 
 auth = None
 AUTH_TYPE = getenv("AUTH_TYPE")
+AUTH_INSTRUMENTATION = getenv("AUTH_INSTRUMENTATION", "0") == "1"
 if AUTH_TYPE == "auth":
     from api.v1.auth.auth import Auth
     auth = Auth()
@@ -30,6 +32,9 @@ elif AUTH_TYPE == "session_exp_auth":
 elif AUTH_TYPE == 'session_db_auth':
     from api.v1.auth.session_db_auth import SessionDBAuth
     auth = SessionDBAuth()
+elif AUTH_TYPE == 'signed_session_auth':
+    from api.v1.auth.signed_session_auth import SignedSessionAuth
+    auth = SignedSessionAuth()
 
 
 @app.errorhandler(404)
@@ -53,21 +58,32 @@ def forbidden_access(error) -> str:
     return jsonify({"error": "Forbidden"}), 403
 
 
+EXCLUDED_PATHS = PathMatcher(['/api/v1/status/',
+                              '/api/v1/unauthorized/',
+                              '/api/v1/forbidden/',
+                              '/api/v1/auth_session/login/'])
+
+
 @app.before_request
 def request_filter() -> None:
     """Method that checks and filters each request"""
-    excluded_paths = ['/api/v1/status/',
-                      '/api/v1/unauthorized/',
-                      '/api/v1/forbidden/',
-                      '/api/v1/auth_session/login/']
     if auth:
-        if auth.require_auth(request.path, excluded_paths):
+        if auth.require_auth(request.path, EXCLUDED_PATHS):
             if auth.authorization_header(request) is None and \
                     auth.session_cookie(request) is None:
                 abort(401)
-            if auth.current_user(request) is None:
+            user = auth.resolve_user(request)
+            if user is None:
                 abort(403)
-            request.current_user = auth.current_user(request)
+            request.current_user = user
+
+
+@app.after_request
+def auth_instrumentation(response):
+    """Expose the number of user lookups made for the request"""
+    if AUTH_INSTRUMENTATION:
+        response.headers['X-Auth-Lookups'] = str(g.get('auth_lookups', 0))
+    return response
 
 
 if __name__ == "__main__":
@@ -1,6 +1,6 @@
 #!/usr/bin/env python3
 """ This module contains the Auth class"""
-from flask import request
+from flask import request, g, has_request_context
 from typing import List, TypeVar
 from os import getenv
 
@@ -8,6 +8,58 @@ User = TypeVar('User')
 SESSION_NAME = getenv('SESSION_NAME')
 
 
+class PathMatcher:
+    """
+    Excluded path patterns compiled once: exact paths (slash tolerant)
+    go in a set, wildcard patterns ("/api/v1/stat*") in a prefix trie,
+    so matching a path costs O(len(path)) whatever the number of patterns.
+    """
+    _END = None
+
+    def __init__(self, patterns: List[str]):
+        """ Compile the patterns """
+        self._exact = set()
+        self._prefixes = {}
+        self._size = 0
+        for pattern in patterns:
+            self.add(pattern)
+
+    @staticmethod
+    def _normalize(path: str) -> str:
+        """ Path with exactly one trailing slash """
+        return path if path.endswith('/') else path + '/'
+
+    def add(self, pattern: str):
+        """ Add one pattern """
+        self._size += 1
+        if not pattern.endswith('*'):
+            self._exact.add(self._normalize(pattern))
+            return
+        node = self._prefixes
+        for char in pattern[:-1]:
+            node = node.setdefault(char, {})
+        node[self._END] = True
+
+    def match(self, path: str) -> bool:
+        """ Whether path matches one of the patterns """
+        if self._normalize(path) in self._exact:
+            return True
+        node = self._prefixes
+        if self._END in node:
+            return True
+        for char in path:
+            node = node.get(char)
+            if node is None:
+                return False
+            if self._END in node:
+                return True
+        return False
+
+    def __len__(self) -> int:
+        """ Number of patterns """
+        return self._size
+
+
 class Auth:
     """
     A class for handling user authentication and authorization.
@@ -15,19 +67,27 @@ class Auth:
 
     def require_auth(self, path: str, excluded_paths: List[str]) -> bool:
         """ Determine whether the given request path requires authentication.
+
+        excluded_paths is either a PathMatcher built at startup or a list
+        of patterns, compiled on first use
         """
         if path is None:
             return True
         if not excluded_paths:
             return True
-        for pattern in excluded_paths:
-            if pattern.endswith('*'):
-                if path.startswith(pattern[:-1]):
-                    return False
-            elif pattern == path or pattern == f'{path}/':
-                return False
+        if not isinstance(excluded_paths, PathMatcher):
+            excluded_paths = self._path_matcher(excluded_paths)
+
+        return not excluded_paths.match(path)
 
-        return True
+    def _path_matcher(self, excluded_paths: List[str]) -> PathMatcher:
+        """ PathMatcher of a list of patterns, compiled once per list """
+        key = tuple(excluded_paths)
+        matchers = self.__dict__.setdefault('_path_matchers', {})
+        matcher = matchers.get(key)
+        if matcher is None:
+            matcher = matchers[key] = PathMatcher(excluded_paths)
+        return matcher
 
     def authorization_header(self, request=None) -> str:
         """  Validate all requests to secure the API
@@ -44,6 +104,18 @@ class Auth:
         """
         return None
 
+    def resolve_user(self, request=None) -> User:
+        """ current_user() memoized for the current request: whatever the
+        backend, the user is looked up at most once per request.
+        g.auth_lookups counts the lookups actually made
+        """
+        if not has_request_context():
+            return self.current_user(request)
+        if 'auth_user' not in g:
+            g.auth_lookups = g.get('auth_lookups', 0) + 1
+            g.auth_user = self.current_user(request)
+        return g.auth_user
+
     def session_cookie(self, request=None):
         """ Returns a cookie value from a request """
         if request is None:
@@ -2,14 +2,34 @@
 """ This module contains the BasicAuth class"""
 from api.v1.auth.auth import Auth
 from base64 import b64decode
+from collections import OrderedDict
+from os import getenv
 from typing import TypeVar, Optional
 from models.user import User as usr
+import hashlib
+import hmac
+import os
+import threading
+import time
 
 User = TypeVar('User')
+BASIC_AUTH_CACHE_SIZE = int(getenv('BASIC_AUTH_CACHE_SIZE', 1024))
+BASIC_AUTH_CACHE_TTL = int(getenv('BASIC_AUTH_CACHE_TTL', 300))
 
 
 class BasicAuth(Auth):
-    """ class BasicAuth that inherits from Auth """
+    """ class BasicAuth that inherits from Auth
+
+    Verified Authorization headers are cached (LRU, with a TTL) under a
+    keyed hash of the header, so a client repeating the same credentials
+    skips the decoding, the email search and the password check
+    """
+
+    def __init__(self):
+        """ Initialize the verified-credential cache """
+        self._cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._cache_key = os.urandom(32)
 
     def extract_base64_authorization_header(
             self, authorization_header: str) -> str:
@@ -70,6 +90,50 @@ class BasicAuth(Auth):
 
         return None
 
+    def _cache_digest(self, auth_header: str) -> bytes:
+        """ Keyed hash of an Authorization header, so raw credentials are
+        never kept in memory
+        """
+        return hmac.new(self._cache_key, auth_header.encode('utf-8'),
+                        hashlib.sha256).digest()
+
+    def cached_user(self, auth_header: str) -> Optional[User]:
+        """ User previously verified for this exact header, if the entry
+        is still fresh and the user still exists with the same password
+        """
+        if BASIC_AUTH_CACHE_SIZE <= 0 or not isinstance(auth_header, str):
+            return None
+        digest = self._cache_digest(auth_header)
+        with self._cache_lock:
+            entry = self._cache.get(digest)
+            if entry is None:
+                return None
+            user_id, password, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._cache[digest]
+                return None
+            self._cache.move_to_end(digest)
+
+        user = usr.get(user_id)
+        if user is None or user.password != password:
+            with self._cache_lock:
+                self._cache.pop(digest, None)
+            return None
+        return user
+
+    def cache_user(self, auth_header: str, user: User):
+        """ Remember that auth_header was verified for user """
+        if BASIC_AUTH_CACHE_SIZE <= 0:
+            return
+        digest = self._cache_digest(auth_header)
+        entry = (user.id, user.password,
+                 time.monotonic() + BASIC_AUTH_CACHE_TTL)
+        with self._cache_lock:
+            self._cache[digest] = entry
+            self._cache.move_to_end(digest)
+            while len(self._cache) > BASIC_AUTH_CACHE_SIZE:
+                self._cache.popitem(last=False)
+
     def current_user(self, request=None) -> User:
         """Retrieves the User instance for a request using Basic Authentication
         """
@@ -78,6 +142,9 @@ class BasicAuth(Auth):
             return None
 
         auth_header = self.authorization_header(request)
+        user = self.cached_user(auth_header)
+        if user is not None:
+            return user
 
         base64_auth_header = \
             self.extract_base64_authorization_header(auth_header)
@@ -89,5 +156,7 @@ class BasicAuth(Auth):
             self.extract_user_credentials(decoded_auth_header)
 
         user = self.user_object_from_credentials(user_email, user_pwd)
+        if user is not None:
+            self.cache_user(auth_header, user)
 
         return user
@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+""" Module contains the MmapSessionStore class"""
+from contextlib import contextmanager
+from datetime import datetime
+from api.v1.auth.session_store import SessionStore
+import fcntl
+import math
+import mmap
+import os
+import struct
+import threading
+import time
+import zlib
+
+HEADER = struct.Struct('<8sIIQQ')
+SLOT = struct.Struct('<B7x64s64sdd')
+MAGIC = b'SESSMMAP'
+EMPTY = 0
+USED = 1
+
+
+class MmapSessionStore(SessionStore):
+    """Sessions stored in a fixed-size hash table in a memory-mapped
+    file, shared by every (forked) worker process of the host
+
+    File layout: a header (magic, capacity, count, expired and evicted
+    counters) followed by capacity slots of (state, session ID, user ID,
+    created_at, expires_at). Slots are found by linear probing from the
+    crc32 of the session ID, deletions shift the following slots back so
+    no tombstone is ever left. Writers hold an exclusive flock on the
+    file, readers a shared one.
+
+    The table has room for max_sessions (default: 65536) sessions, at
+    half load: when it is full, expired sessions are reaped and then the
+    session closest to expiry is evicted. IDs are limited to 64 bytes.
+    """
+
+    def __init__(self, session_duration: int = 0, max_sessions: int = 0,
+                 reap_interval: int = 60, file_path: str = None):
+        """Initialize the store, creating the file if needed"""
+        super().__init__(session_duration, max_sessions or 65536,
+                         reap_interval)
+        self.file_path = file_path or '.sessions.mmap'
+        self._open()
+        self._start_reaper()
+
+    def _open(self):
+        """Open (or create) and map the file"""
+        self._pid = os.getpid()
+        self._thread_lock = threading.Lock()
+        self._fd = os.open(self.file_path, os.O_RDWR | os.O_CREAT, 0o600)
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        try:
+            if os.fstat(self._fd).st_size == 0:
+                capacity = 2 * self.max_sessions
+                os.ftruncate(self._fd, HEADER.size + capacity * SLOT.size)
+                os.pwrite(self._fd, HEADER.pack(MAGIC, capacity, 0, 0, 0), 0)
+            header = os.pread(self._fd, HEADER.size, 0)
+            magic, capacity, _, _, _ = HEADER.unpack(header)
+            if magic != MAGIC:
+                raise ValueError("{} is not a session store"
+                                 .format(self.file_path))
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+        self.capacity = capacity
+        self.max_sessions = capacity // 2
+        self._mm = mmap.mmap(self._fd, 0)
+
+    @contextmanager
+    def _locked(self, exclusive: bool = True):
+        """Hold the store lock, across threads and processes"""
+        if self._pid != os.getpid():
+            # flock belongs to the open file: a forked child needs its own
+            self._pid = os.getpid()
+            self._thread_lock = threading.Lock()
+            self._fd = os.open(self.file_path, os.O_RDWR)
+        with self._thread_lock:
+            fcntl.flock(self._fd, fcntl.LOCK_EX if exclusive
+                        else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def _header(self) -> list:
+        """[magic, capacity, count, expired, evicted]"""
+        return list(HEADER.unpack_from(self._mm, 0))
+
+    def _add_to_header(self, count: int = 0, expired: int = 0,
+                       evicted: int = 0):
+        """Update the counters of the header (lock held)"""
+        header = self._header()
+        header[2] += count
+        header[3] += expired
+        header[4] += evicted
+        HEADER.pack_into(self._mm, 0, *header)
+
+    def _slot(self, index: int) -> tuple:
+        """(state, session ID, user ID, created_at, expires_at)"""
+        return SLOT.unpack_from(self._mm, HEADER.size + index * SLOT.size)
+
+    def _write_slot(self, index: int, *slot):
+        """Overwrite a slot"""
+        SLOT.pack_into(self._mm, HEADER.size + index * SLOT.size, *slot)
+
+    def _home(self, key: bytes) -> int:
+        """Slot a key hashes to"""
+        return zlib.crc32(key) % self.capacity
+
+    @staticmethod
+    def _key(value: str) -> bytes:
+        """Fixed-size field for an ID"""
+        key = value.encode('utf-8')
+        if len(key) > 64:
+            raise ValueError("IDs are limited to 64 bytes")
+        return key
+
+    def _find(self, key: bytes) -> int:
+        """Index of the slot holding key, -1 if there is none"""
+        index = self._home(key)
+        for _ in range(self.capacity):
+            state, slot_key, _, _, _ = self._slot(index)
+            if state == EMPTY:
+                return -1
+            if slot_key.rstrip(b'\0') == key:
+                return index
+            index = (index + 1) % self.capacity
+        return -1
+
+    def _delete_at(self, index: int):
+        """Empty a slot, shifting back the slots probed past it"""
+        hole = index
+        index = (index + 1) % self.capacity
+        while True:
+            slot = self._slot(index)
+            if slot[0] == EMPTY:
+                break
+            home = self._home(slot[1].rstrip(b'\0'))
+            if hole <= index:
+                movable = home <= hole or home > index
+            else:
+                movable = home <= hole and home > index
+            if movable:
+                self._write_slot(hole, *slot)
+                hole = index
+            index = (index + 1) % self.capacity
+        self._write_slot(hole, EMPTY, b'', b'', 0.0, 0.0)
+        self._add_to_header(count=-1)
+
+    def __setitem__(self, session_id: str, session):
+        """Store a session: a session dictionary or a bare user ID"""
+        key = self._key(session_id)
+        created_at = self._created_at(session)
+        if isinstance(session, dict):
+            user_id = session.get('user_id')
+            created_at = (created_at or datetime.now()).timestamp()
+        else:
+            user_id = session
+            created_at = math.nan
+        expires_at = math.inf
+        if self.session_duration > 0:
+            expires_at = self._expires_at(session).timestamp()
+        slot = (USED, key, self._key(user_id or ''), created_at, expires_at)
+
+        with self._locked():
+            index = self._find(key)
+            if index >= 0:
+                self._write_slot(index, *slot)
+                return
+            if self._header()[2] >= self.max_sessions:
+                self._reap()
+            if self._header()[2] >= self.max_sessions:
+                self._evict()
+            index = self._home(key)
+            while self._slot(index)[0] != EMPTY:
+                index = (index + 1) % self.capacity
+            self._write_slot(index, *slot)
+            self._add_to_header(count=1)
+
+    def _evict(self):
+        """Drop the session closest to expiry (lock held)"""
+        victim = None
+        for index in range(self.capacity):
+            state, _, _, _, expires_at = self._slot(index)
+            if state == USED and \
+                    (victim is None or expires_at < victim[1]):
+                victim = (index, expires_at)
+        if victim is not None:
+            self._delete_at(victim[0])
+            self._add_to_header(evicted=1)
+
+    def get(self, session_id: str, default=None):
+        """Session stored under session_id, or default if it is unknown
+        or expired (an expired session is dropped on the spot)
+        """
+        try:
+            key = self._key(session_id)
+        except ValueError:
+            return default
+        with self._locked(exclusive=False):
+            index = self._find(key)
+            if index < 0:
+                return default
+            _, _, user_id, created_at, expires_at = self._slot(index)
+        if expires_at < time.time():
+            with self._locked():
+                index = self._find(key)
+                if index >= 0 and self._slot(index)[4] == expires_at:
+                    self._delete_at(index)
+                    self._add_to_header(expired=1)
+            return default
+        user_id = user_id.rstrip(b'\0').decode('utf-8')
+        if math.isnan(created_at):
+            return user_id
+        return {
+            'user_id': user_id,
+            'created_at': datetime.fromtimestamp(created_at),
+        }
+
+    def __delitem__(self, session_id: str):
+        """Forget a session"""
+        try:
+            key = self._key(session_id)
+        except ValueError:
+            raise KeyError(session_id)
+        with self._locked():
+            index = self._find(key)
+            if index < 0:
+                raise KeyError(session_id)
+            self._delete_at(index)
+
+    def __len__(self) -> int:
+        """Number of sessions held (expired ones not reaped yet included)"""
+        with self._locked(exclusive=False):
+            return self._header()[2]
+
+    def _reap(self) -> int:
+        """Drop every expired session (lock held)"""
+        now = time.time()
+        reaped = 0
+        index = 0
+        while index < self.capacity:
+            state, _, _, _, expires_at = self._slot(index)
+            if state == USED and expires_at < now:
+                # the next slot may be shifted back here: look again
+                self._delete_at(index)
+                reaped += 1
+                continue
+            index += 1
+        self._add_to_header(expired=reaped)
+        return reaped
+
+    def reap(self) -> int:
+        """Drop every expired session, return how many were dropped"""
+        with self._locked():
+            return self._reap()
+
+    def stats(self) -> dict:
+        """Live, expired and evicted session counts of every process"""
+        with self._locked(exclusive=False):
+            _, _, count, expired, evicted = self._header()
+        return {
+            'live': count,
+            'expired': expired,
+            'evicted': evicted,
+        }
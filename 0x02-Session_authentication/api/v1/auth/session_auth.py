@@ -1,6 +1,7 @@
 #!/usr/bin/env python3
 """ This module contains the SessionAuth class"""
 from api.v1.auth.auth import Auth
+from api.v1.auth.session_store import create_session_store
 from models.user import User
 from os import getenv
 import uuid
@@ -9,8 +10,19 @@ SESSION_NAME = getenv('SESSION_NAME')
 
 
 class SessionAuth(Auth):
-    """ Empty class"""
+    """ Session authentication
+
+    Sessions live in the store selected by SESSION_STORE (see
+    create_session_store): process memory by default, or a store shared
+    by every worker process of the host
+    """
     user_id_by_session_id = {}
+    session_duration = 0
+
+    def __init__(self):
+        """ Initialize the session store """
+        self.user_id_by_session_id = create_session_store(
+            self.session_duration)
 
     def create_session(self, user_id: str = None) -> str:
         """ Creates a Session ID for a user_id: """
@@ -49,5 +61,9 @@ class SessionAuth(Auth):
         if user_id is None:
             return False
 
-        del self.user_id_by_session_id[session_id]
+        try:
+            # another worker, or the reaper, may have dropped it since
+            del self.user_id_by_session_id[session_id]
+        except KeyError:
+            return False
         return True
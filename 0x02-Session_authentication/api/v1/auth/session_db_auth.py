@@ -2,13 +2,25 @@
 """ This module contains the SessionDBAuth """
 
 from flask import request
+from os import getenv
 from datetime import datetime, timedelta
 from models.user_session import UserSession
 from api.v1.auth.session_exp_auth import SessionExpAuth
+import time
 
 
 class SessionDBAuth(SessionExpAuth):
-    """class with authentication data stored in database"""
+    """class with authentication data stored in database
+
+    Expired UserSession records are purged in bulk, at most every
+    SESSION_PURGE_INTERVAL seconds, when new sessions are created
+    """
+
+    def __init__(self):
+        """Initialize the SessionDBAuth instance"""
+        super().__init__()
+        self.purge_interval = int(getenv('SESSION_PURGE_INTERVAL', 3600))
+        self._last_purge = time.monotonic()
 
     def create_session(self, user_id=None) -> str:
         """ Creates and stores new instance of UserSession
@@ -22,34 +34,79 @@ class SessionDBAuth(SessionExpAuth):
             }
             user_session = UserSession(**kwargs)
             user_session.save()
+            if self.purge_interval > 0 and \
+                    time.monotonic() - self._last_purge > self.purge_interval:
+                self._last_purge = time.monotonic()
+                self.purge_expired_sessions()
             return session_id
 
-    def user_id_for_session_id(self, session_id=None):
-        """Returns the User ID by requesting UserSession in the database
-        based on session_id"""
+    def _user_session(self, session_id=None) -> UserSession:
+        """Returns the UserSession stored for session_id"""
+        if session_id is None or not isinstance(session_id, str):
+            return None
         try:
-            sessions = UserSession.search({'session_id': session_id})
+            user_session = UserSession.get(session_id)
+            if user_session is None:
+                # sessions stored before they were keyed by session ID
+                sessions = UserSession.search({'session_id': session_id})
+                user_session = sessions[0] if len(sessions) > 0 else None
         except Exception:
             return None
-        if len(sessions) <= 0:
-            return None
+        return user_session
 
-        current = datetime.now()
+    def _is_expired(self, user_session: UserSession, now=None) -> bool:
+        """Whether a UserSession is older than session_duration"""
+        if self.session_duration <= 0:
+            return False
+        now = now or datetime.utcnow()
         time_span = timedelta(seconds=self.session_duration)
-        expire_time = sessions[0].created_at + time_span
-        if expire_time < current:
+        return user_session.created_at + time_span < now
+
+    def user_id_for_session_id(self, session_id=None):
+        """Returns the User ID by requesting UserSession in the database
+        based on session_id"""
+        user_session = self._user_session(session_id)
+        if user_session is None or self._is_expired(user_session):
             return None
-        return sessions[0].user_id
+        return user_session.user_id
 
     def destroy_session(self, request=None) -> bool:
         """ Destroys the UserSession based on the Session ID
         from the request cookie """
         session_id = self.session_cookie(request)
-        try:
-            sessions = UserSession.search({'session_id': session_id})
-        except Exception:
+        user_session = self._user_session(session_id)
+        if user_session is None:
             return False
-        if len(sessions) <= 0:
-            return False
-        sessions[0].remove()
+        user_session.remove()
         return True
+
+    def destroy_all_sessions(self, user_id: str = None) -> int:
+        """Logs a user out everywhere: removes all their UserSession
+        (looked up through the user_id index) with a single write"""
+        if user_id is None or not isinstance(user_id, str):
+            return 0
+        try:
+            sessions = UserSession.search({'user_id': user_id})
+        except Exception:
+            return 0
+        return UserSession.remove_many(sessions)
+
+    def session_stats(self) -> dict:
+        """Number of UserSession records stored (expired ones not purged
+        yet included)"""
+        return {'stored': UserSession.count()}
+
+    def purge_expired_sessions(self) -> int:
+        """Removes every expired UserSession with a single write,
+        returns the number of sessions removed"""
+        if self.session_duration <= 0:
+            return 0
+        now = datetime.utcnow()
+        try:
+            expired = [user_session for user_session in UserSession.all()
+                       if self._is_expired(user_session, now)]
+        except Exception:
+            return 0
+        if len(expired) == 0:
+            return 0
+        return UserSession.remove_many(expired)
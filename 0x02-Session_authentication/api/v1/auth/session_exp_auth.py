@@ -2,21 +2,26 @@
 """Module contains the SessionExpAuth class"""
 
 from os import getenv
-from datetime import datetime, timedelta
+from datetime import datetime
 from api.v1.auth.session_auth import SessionAuth
 
 
 class SessionExpAuth(SessionAuth):
-    """Class for session-based authentication with session expiration"""
+    """Class for session-based authentication with session expiration
+
+    Expired sessions are reaped from the session store in the background
+    every SESSION_REAP_INTERVAL seconds, and at most SESSION_MAX sessions
+    are kept (0: no limit)
+    """
 
     def __init__(self):
         """Initialize the SessionExpAuth instance"""
 
-        super().__init__()
         try:
             self.session_duration = int(getenv('SESSION_DURATION'))
         except Exception:
             self.session_duration = 0
+        super().__init__()
 
     def create_session(self, user_id=None):
         """Create a session with expiration
@@ -40,18 +45,15 @@ class SessionExpAuth(SessionAuth):
 
         if session_id is None or isinstance(session_id, str) is False:
             return None
+        # the store already drops sessions older than session_duration
         session_dict = self.user_id_by_session_id.get(session_id)
 
-        if session_dict is None or 'created_at' not in session_dict:
+        if not isinstance(session_dict, dict) or \
+                'created_at' not in session_dict:
             return None
 
-        if self.session_duration <= 0:
-            return session_dict.get("user_id")
+        return session_dict.get('user_id')
 
-        created_time = session_dict.get('created_at')
-        session_elapsed = timedelta(seconds=self.session_duration)
-
-        if created_time + session_elapsed < datetime.now():
-            return None
-        else:
-            return session_dict.get('user_id')
+    def session_stats(self) -> dict:
+        """Live, expired and evicted session counts"""
+        return self.user_id_by_session_id.stats()
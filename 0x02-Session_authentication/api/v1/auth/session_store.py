@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+""" Module contains the session stores used by SessionAuth"""
+from datetime import datetime, timedelta
+from os import getenv
+import heapq
+import itertools
+import os
+import threading
+import time
+
+
+class SessionStore:
+    """Template of a session store: a session ID -> session mapping that
+    forgets sessions older than session_duration
+
+    A session is what SessionAuth/SessionExpAuth store: a bare user ID,
+    or a session dictionary ({'user_id': ..., 'created_at': datetime}).
+    """
+
+    def __init__(self, session_duration: int = 0, max_sessions: int = 0,
+                 reap_interval: int = 60):
+        """Initialize the store
+
+        session_duration <= 0 means sessions never expire,
+        max_sessions <= 0 means the store is unbounded
+        """
+        self.session_duration = session_duration
+        self.max_sessions = max_sessions
+        self.reap_interval = reap_interval
+        self._reaper = None
+
+    def _start_reaper(self):
+        """Start the background reaper, when sessions can expire, in this
+        process and in every worker forked from it
+        """
+        if self.session_duration <= 0 or self.reap_interval <= 0:
+            return
+        self._start_reaper_thread()
+        os.register_at_fork(after_in_child=self._start_reaper_thread)
+
+    def _start_reaper_thread(self):
+        """Start the reaper thread"""
+        self._reaper = threading.Thread(target=self._reap_loop,
+                                        name="session-reaper", daemon=True)
+        self._reaper.start()
+
+    def _reap_loop(self):
+        """Background reaper"""
+        while True:
+            time.sleep(self.reap_interval)
+            self.reap()
+
+    @staticmethod
+    def _created_at(session) -> datetime:
+        """Creation time of a session, None for a bare user ID"""
+        if isinstance(session, dict):
+            return session.get('created_at')
+        return None
+
+    def _expires_at(self, session) -> datetime:
+        """Expiry time of a session (datetime.max if it never expires)"""
+        if self.session_duration <= 0:
+            return datetime.max
+        created_at = self._created_at(session) or datetime.now()
+        return created_at + timedelta(seconds=self.session_duration)
+
+    def __setitem__(self, session_id: str, session):
+        """Store a session"""
+        raise NotImplementedError
+
+    def get(self, session_id: str, default=None):
+        """Session stored under session_id, or default if it is unknown
+        or expired
+        """
+        raise NotImplementedError
+
+    def __delitem__(self, session_id: str):
+        """Forget a session"""
+        raise NotImplementedError
+
+    def __len__(self) -> int:
+        """Number of sessions held"""
+        raise NotImplementedError
+
+    def reap(self) -> int:
+        """Drop every expired session, return how many were dropped"""
+        raise NotImplementedError
+
+    def stats(self) -> dict:
+        """Live, expired and evicted session counts"""
+        raise NotImplementedError
+
+    def __getitem__(self, session_id: str):
+        """Session stored under session_id"""
+        session = self.get(session_id, self)
+        if session is self:
+            raise KeyError(session_id)
+        return session
+
+    def __contains__(self, session_id: str) -> bool:
+        """Whether a live session is stored under session_id"""
+        return self.get(session_id, self) is not self
+
+
+class MemorySessionStore(SessionStore):
+    """Sessions held in the memory of the process
+
+    Sessions are also kept in a heap ordered by expiry time, so that
+    expired ones are reaped (by a background thread) without scanning
+    the whole store, and so that the sessions closest to expiry are the
+    ones evicted when the store is full.
+    """
+
+    def __init__(self, session_duration: int = 0, max_sessions: int = 0,
+                 reap_interval: int = 60):
+        """Initialize the store"""
+        super().__init__(session_duration, max_sessions, reap_interval)
+        self._sessions = {}
+        self._heap = []
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        self._expired = 0
+        self._evicted = 0
+        self._start_reaper()
+
+    def __setitem__(self, session_id: str, session):
+        """Store a session: a session dictionary or a bare user ID"""
+        expires_at = self._expires_at(session)
+        seq = next(self._seq)
+        with self._lock:
+            self._sessions[session_id] = (session, expires_at, seq)
+            heapq.heappush(self._heap, (expires_at, seq, session_id))
+            if 0 < self.max_sessions < len(self._sessions):
+                self._evict()
+            if len(self._heap) > 2 * len(self._sessions) + 64:
+                self._rebuild_heap()
+
+    def get(self, session_id: str, default=None):
+        """Session stored under session_id, or default if it is unknown
+        or expired (an expired session is dropped on the spot)
+        """
+        entry = self._sessions.get(session_id)
+        if entry is None:
+            return default
+        session, expires_at, seq = entry
+        if expires_at < datetime.now():
+            with self._lock:
+                if self._sessions.get(session_id) is entry:
+                    del self._sessions[session_id]
+                    self._expired += 1
+            return default
+        return session
+
+    def __delitem__(self, session_id: str):
+        """Forget a session"""
+        with self._lock:
+            del self._sessions[session_id]
+
+    def __len__(self) -> int:
+        """Number of sessions held (expired ones not reaped yet included)"""
+        return len(self._sessions)
+
+    def _is_current(self, seq: int, session_id: str) -> bool:
+        """Whether a heap entry still describes the stored session"""
+        entry = self._sessions.get(session_id)
+        return entry is not None and entry[2] == seq
+
+    def _evict(self):
+        """Drop the session closest to expiry (lock held)"""
+        while self._heap:
+            expires_at, seq, session_id = heapq.heappop(self._heap)
+            if self._is_current(seq, session_id):
+                del self._sessions[session_id]
+                self._evicted += 1
+                return
+
+    def _rebuild_heap(self):
+        """Drop the heap entries of replaced or deleted sessions
+        (lock held)
+        """
+        self._heap = [(expires_at, seq, session_id)
+                      for session_id, (_, expires_at, seq)
+                      in self._sessions.items()]
+        heapq.heapify(self._heap)
+
+    def reap(self) -> int:
+        """Drop every expired session, return how many were dropped"""
+        now = datetime.now()
+        reaped = 0
+        with self._lock:
+            while self._heap and self._heap[0][0] < now:
+                expires_at, seq, session_id = heapq.heappop(self._heap)
+                if self._is_current(seq, session_id):
+                    del self._sessions[session_id]
+                    reaped += 1
+            self._expired += reaped
+        return reaped
+
+    def stats(self) -> dict:
+        """Live, expired and evicted session counts"""
+        return {
+            'live': len(self._sessions),
+            'expired': self._expired,
+            'evicted': self._evicted,
+        }
+
+
+def create_session_store(session_duration: int = 0) -> SessionStore:
+    """Session store selected by SESSION_STORE:
+      - memory (default): sessions of this process only
+      - sqlite: SQLite file shared by every process of the host
+      - mmap: shared memory-mapped file, for forked workers of one host
+    """
+    max_sessions = int(getenv('SESSION_MAX', 0))
+    reap_interval = int(getenv('SESSION_REAP_INTERVAL', 60))
+    store_type = getenv('SESSION_STORE', 'memory')
+    if store_type == 'sqlite':
+        from api.v1.auth.sqlite_session_store import SQLiteSessionStore
+        return SQLiteSessionStore(session_duration, max_sessions,
+                                  reap_interval,
+                                  getenv('SESSION_STORE_PATH'))
+    if store_type == 'mmap':
+        from api.v1.auth.mmap_session_store import MmapSessionStore
+        return MmapSessionStore(session_duration, max_sessions,
+                                reap_interval, getenv('SESSION_STORE_PATH'))
+    return MemorySessionStore(session_duration, max_sessions, reap_interval)
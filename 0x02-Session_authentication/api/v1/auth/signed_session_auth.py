@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+""" This module contains the SignedSessionAuth class"""
+from api.v1.auth.auth import Auth
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from models.user import User
+from os import getenv
+import hashlib
+import hmac
+import os
+import threading
+import time
+
+
+def b64encode(data: bytes) -> str:
+    """ Unpadded URL-safe base64 """
+    return urlsafe_b64encode(data).rstrip(b'=').decode('ascii')
+
+
+def b64decode(data: str) -> bytes:
+    """ Decode unpadded URL-safe base64 """
+    return urlsafe_b64decode(data + '=' * (-len(data) % 4))
+
+
+class SignedSessionAuth(Auth):
+    """ Stateless session authentication
+
+    The session ID is a token carrying the user ID, its issue time (in
+    milliseconds) and its expiry time, signed with HMAC-SHA256 under
+    SESSION_SECRET:
+
+        base64(<user_id>:<issued_at>:<expires_at>:<nonce>).base64(<sig>)
+
+    so a session is checked without any session store, by every worker
+    sharing the secret. SESSION_SECRET and a SESSION_DURATION > 0 are
+    both required: tokens always expire.
+
+    Logging out revokes every token of the user issued up to the logged
+    out one: this process keeps a user_id -> issued_at cutoff, one entry
+    per user at most, dropped once every token it covers has expired.
+    """
+
+    def __init__(self):
+        """ Initialize the secret and the revocation cutoffs """
+        secret = getenv('SESSION_SECRET')
+        if not secret:
+            raise ValueError("signed_session_auth needs SESSION_SECRET")
+        self._secret = secret.encode('utf-8')
+        try:
+            self.session_duration = int(getenv('SESSION_DURATION'))
+        except Exception:
+            self.session_duration = 0
+        if self.session_duration <= 0:
+            raise ValueError("signed_session_auth needs SESSION_DURATION > 0")
+        self._revoked_before = {}
+        self._revoked_lock = threading.Lock()
+
+    def _sign(self, payload: str) -> str:
+        """ Signature of a token payload """
+        return b64encode(hmac.new(self._secret, payload.encode('ascii'),
+                                  hashlib.sha256).digest())
+
+    def create_session(self, user_id: str = None) -> str:
+        """ Creates a signed session token for a user_id """
+        if user_id is None or not isinstance(user_id, str):
+            return None
+
+        # issued after the revocation cutoff of the user, even within the
+        # millisecond of a logout
+        issued_at = max(time.time_ns() // 1000000,
+                        self._revoked_before.get(user_id, -1) + 1)
+        expires_at = issued_at // 1000 + self.session_duration
+        payload = b64encode("{}:{}:{}:{}".format(
+            user_id, issued_at, expires_at,
+            os.urandom(8).hex()).encode('utf-8'))
+        return "{}.{}".format(payload, self._sign(payload))
+
+    def _verify(self, session_id: str):
+        """ (user_id, issued_at) of a valid, unexpired, unrevoked token,
+        else None
+        """
+        if session_id is None or not isinstance(session_id, str):
+            return None
+        payload, _, signature = session_id.partition('.')
+        try:
+            if not hmac.compare_digest(signature, self._sign(payload)):
+                return None
+            user_id, issued_at, expires_at, _ = \
+                b64decode(payload).decode('utf-8').rsplit(':', 3)
+            issued_at = int(issued_at)
+            expires_at = int(expires_at)
+        except (ValueError, UnicodeError, TypeError):
+            return None
+        if expires_at < time.time():
+            return None
+        if issued_at <= self._revoked_before.get(user_id, -1):
+            return None
+        return user_id, issued_at
+
+    def user_id_for_session_id(self, session_id: str = None) -> str:
+        """ Returns the user ID of a valid, unrevoked token """
+        verified = self._verify(session_id)
+        if verified is None:
+            return None
+        return verified[0]
+
+    def current_user(self, request=None):
+        """ Returns a user instance based on a cookie value """
+        cookie = self.session_cookie(request)
+        user_id = self.user_id_for_session_id(cookie)
+        if user_id is None:
+            return None
+        return User.get(user_id)
+
+    def destroy_session(self, request=None):
+        """ Revoke the session token, and every older token of its user /
+        logout
+        """
+        if not request:
+            return False
+
+        verified = self._verify(self.session_cookie(request))
+        if verified is None:
+            return False
+
+        user_id, issued_at = verified
+        with self._revoked_lock:
+            self._purge_revoked()
+            self._revoked_before[user_id] = max(
+                issued_at, self._revoked_before.get(user_id, -1))
+        return True
+
+    def _purge_revoked(self):
+        """ Drop the cutoffs whose tokens have all expired (lock held) """
+        oldest = (time.time() - self.session_duration - 1) * 1000
+        for user_id, issued_at in list(self._revoked_before.items()):
+            if issued_at < oldest:
+                del self._revoked_before[user_id]
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+""" Module contains the SQLiteSessionStore class"""
+from datetime import datetime
+from api.v1.auth.session_store import SessionStore
+import os
+import sqlite3
+import threading
+import time
+
+
+class SQLiteSessionStore(SessionStore):
+    """Sessions stored in a SQLite file (WAL mode), shared by every
+    worker process of the host
+
+    Times are stored as epoch seconds; expires_at is NULL for sessions
+    that never expire, and indexed for reaping and eviction.
+    """
+
+    def __init__(self, session_duration: int = 0, max_sessions: int = 0,
+                 reap_interval: int = 60, db_path: str = None):
+        """Initialize the store"""
+        super().__init__(session_duration, max_sessions, reap_interval)
+        self.db_path = db_path or '.sessions.sqlite3'
+        self._local = threading.local()
+        self._expired = 0
+        self._evicted = 0
+        conn = self._connection
+        conn.execute("CREATE TABLE IF NOT EXISTS sessions ("
+                     "session_id TEXT PRIMARY KEY, user_id TEXT, "
+                     "created_at REAL, expires_at REAL)")
+        conn.execute("CREATE INDEX IF NOT EXISTS ix_sessions_expires_at "
+                     "ON sessions (expires_at)")
+        self._start_reaper()
+
+    @property
+    def _connection(self) -> sqlite3.Connection:
+        """Connection of the current thread (a forked worker never reuses
+        the connection of its parent)
+        """
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.db_path, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=5000")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def __setitem__(self, session_id: str, session):
+        """Store a session: a session dictionary or a bare user ID"""
+        created_at = self._created_at(session)
+        expires_at = None
+        if self.session_duration > 0:
+            expires_at = self._expires_at(session).timestamp()
+        if isinstance(session, dict):
+            user_id = session.get('user_id')
+            created_at = (created_at or datetime.now()).timestamp()
+        else:
+            user_id = session
+        conn = self._connection
+        conn.execute("INSERT OR REPLACE INTO sessions "
+                     "(session_id, user_id, created_at, expires_at) "
+                     "VALUES (?, ?, ?, ?)",
+                     (session_id, user_id, created_at, expires_at))
+        if self.max_sessions > 0:
+            self._evict()
+
+    def _evict(self):
+        """Drop the sessions closest to expiry above max_sessions"""
+        count = self._connection.execute(
+            "SELECT COUNT(*) FROM sessions").fetchone()[0]
+        if count <= self.max_sessions:
+            return
+        cursor = self._connection.execute(
+            "DELETE FROM sessions WHERE session_id IN ("
+            "SELECT session_id FROM sessions "
+            "ORDER BY expires_at IS NULL, expires_at LIMIT ?)",
+            (count - self.max_sessions,))
+        self._evicted += cursor.rowcount
+
+    def get(self, session_id: str, default=None):
+        """Session stored under session_id, or default if it is unknown
+        or expired (an expired session is dropped on the spot)
+        """
+        row = self._connection.execute(
+            "SELECT user_id, created_at, expires_at FROM sessions "
+            "WHERE session_id = ?", (session_id,)).fetchone()
+        if row is None:
+            return default
+        user_id, created_at, expires_at = row
+        if expires_at is not None and expires_at < time.time():
+            cursor = self._connection.execute(
+                "DELETE FROM sessions WHERE session_id = ? "
+                "AND expires_at = ?", (session_id, expires_at))
+            self._expired += cursor.rowcount
+            return default
+        if created_at is None:
+            return user_id
+        return {
+            'user_id': user_id,
+            'created_at': datetime.fromtimestamp(created_at),
+        }
+
+    def __delitem__(self, session_id: str):
+        """Forget a session"""
+        cursor = self._connection.execute(
+            "DELETE FROM sessions WHERE session_id = ?", (session_id,))
+        if cursor.rowcount == 0:
+            raise KeyError(session_id)
+
+    def __len__(self) -> int:
+        """Number of sessions held (expired ones not reaped yet included)"""
+        return self._connection.execute(
+            "SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+    def reap(self) -> int:
+        """Drop every expired session, return how many were dropped"""
+        cursor = self._connection.execute(
+            "DELETE FROM sessions WHERE expires_at < ?", (time.time(),))
+        self._expired += cursor.rowcount
+        return cursor.rowcount
+
+    def stats(self) -> dict:
+        """Live session count, sessions expired and evicted by this
+        process
+        """
+        return {
+            'live': len(self),
+            'expired': self._expired,
+            'evicted': self._evicted,
+        }
@@ -48,7 +48,7 @@ def login() -> Tuple[str, int]:
         return jsonify({"error": "no user found for this email"}), 404
 
 
-@app_views.route('aut_session/logout', methods=['DELETE'],
+@app_views.route('/auth_session/logout', methods=['DELETE'],
                  strict_slashes=False)
 def logout():
     """Handle user logout"""
@@ -2,18 +2,109 @@
 """ Module of Users views
 """
 from api.v1.views import app_views
-from flask import abort, jsonify, request
+from base64 import b64decode, urlsafe_b64encode
+from flask import abort, jsonify, request, Response
 from models.user import User
+import json
+
+PAGE_SIZE = 1000
+
+
+def encode_cursor(user_id: str) -> str:
+    """ Opaque pagination cursor pointing after user_id
+    """
+    return urlsafe_b64encode(user_id.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> str:
+    """ User ID a pagination cursor points after, None if invalid
+    (not strict URL-safe base64, or empty)
+    """
+    try:
+        user_id = b64decode(cursor.encode(), altchars=b'-_',
+                            validate=True).decode()
+    except Exception:
+        return None
+    return user_id or None
 
 
 @app_views.route('/users', methods=['GET'], strict_slashes=False)
 def view_all_users() -> str:
     """ GET /api/v1/users
+    Query parameters (optional):
+      - limit: maximum number of users to return (1 to PAGE_SIZE)
+      - cursor: value of the X-Next-Cursor header of the previous page
+      - format: "ndjson" for one User per line (or Accept:
+        application/x-ndjson)
     Return:
-      - list of all User objects JSON represented
+      - list of User objects JSON represented, ordered by ID and streamed
+        one user at a time. When limit is given and more users follow,
+        the X-Next-Cursor header holds the cursor of the next page
+      - 400 if limit or cursor is invalid
+    """
+    limit = request.args.get('limit')
+    if limit is not None:
+        try:
+            limit = int(limit)
+        except ValueError:
+            limit = 0
+        if limit <= 0 or limit > PAGE_SIZE:
+            return jsonify({'error': "Wrong limit"}), 400
+    after_id = None
+    if request.args.get('cursor') is not None:
+        after_id = decode_cursor(request.args.get('cursor'))
+        if after_id is None:
+            return jsonify({'error': "Wrong cursor"}), 400
+
+    headers = {}
+    if limit is not None:
+        users = User.page(after_id, limit + 1)
+        if len(users) > limit:
+            users = users[:limit]
+            headers['X-Next-Cursor'] = encode_cursor(users[-1].id)
+        pages = iter([users])
+    else:
+        pages = iter_pages(after_id)
+
+    ndjson = request.args.get('format') == 'ndjson' or \
+        request.accept_mimetypes.best == 'application/x-ndjson'
+    if ndjson:
+        return Response(generate_ndjson(pages), headers=headers,
+                        mimetype='application/x-ndjson')
+    return Response(generate_json(pages), headers=headers,
+                    mimetype='application/json')
+
+
+def iter_pages(after_id: str = None):
+    """ Yield all users page by page, PAGE_SIZE at a time
+    """
+    while True:
+        users = User.page(after_id, PAGE_SIZE)
+        if len(users) > 0:
+            yield users
+        if len(users) < PAGE_SIZE:
+            return
+        after_id = users[-1].id
+
+
+def generate_json(pages) -> str:
+    """ Stream users as one JSON array
+    """
+    yield "["
+    separator = ""
+    for users in pages:
+        for user in users:
+            yield separator + json.dumps(user.to_json())
+            separator = ","
+    yield "]\n"
+
+
+def generate_ndjson(pages) -> str:
+    """ Stream users as one JSON document per line
     """
-    all_users = [user.to_json() for user in User.all()]
-    return jsonify(all_users)
+    for users in pages:
+        for user in users:
+            yield json.dumps(user.to_json()) + "\n"
 
 
 @app_views.route('/users/<user_id>', methods=['GET'], strict_slashes=False)
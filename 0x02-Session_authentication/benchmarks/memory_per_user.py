@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+""" Memory held per user, with the former __dict__ based model and with
+the __slots__ based User
+
+Usage: python3 -m benchmarks.memory_per_user [number_of_users]
+"""
+from datetime import datetime
+from models.user import User
+import sys
+import tracemalloc
+import uuid
+
+
+class DictUser():
+    """ User as it was stored before __slots__: same attributes, held in
+    a per-instance __dict__
+    """
+
+    def __init__(self, **kwargs: dict):
+        """ Initialize a DictUser instance
+        """
+        self.id = kwargs.get('id', str(uuid.uuid4()))
+        self.created_at = datetime.utcnow()
+        self.updated_at = datetime.utcnow()
+        self.email = kwargs.get('email')
+        self._password = kwargs.get('_password')
+        self.first_name = kwargs.get('first_name')
+        self.last_name = kwargs.get('last_name')
+
+
+def bytes_per_user(cls: type, count: int) -> float:
+    """ Average memory allocated per user for count users of cls, kept
+    by ID like the storage does
+    """
+    tracemalloc.start()
+    start = tracemalloc.get_traced_memory()[0]
+    users = {}
+    for i in range(count):
+        user = cls(email="user{}@example.com".format(i),
+                   _password="0" * 64, first_name="Bob", last_name="Dylan")
+        users[user.id] = user
+    used = tracemalloc.get_traced_memory()[0] - start
+    tracemalloc.stop()
+    return used / count
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    before = bytes_per_user(DictUser, count)
+    after = bytes_per_user(User, count)
+    print("users:           {:d}".format(count))
+    print("__dict__ model:  {:.0f} bytes/user".format(before))
+    print("__slots__ model: {:.0f} bytes/user".format(after))
+    print("saved:           {:.0f} bytes/user ({:.0%})"
+          .format(before - after, (before - after) / before))
@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+""" Password verification throughput of each password hashing scheme,
+with the cost configured in the environment (BCRYPT_ROUNDS,
+PBKDF2_ITERATIONS, SCRYPT_N/R/P)
+
+Usage: python3 -m benchmarks.password_schemes [seconds_per_scheme]
+"""
+from models import password_hash
+import sys
+import time
+
+
+def verifications_per_second(scheme: str, seconds: float) -> float:
+    """ Verifications of a correct password per second (one core) """
+    hashed = password_hash.hash_password("benchmark password", scheme)
+    count = 0
+    start = time.perf_counter()
+    while True:
+        password_hash.verify_password("benchmark password", hashed)
+        count += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= seconds:
+            return count / elapsed
+
+
+if __name__ == "__main__":
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 2
+    print("{:15s} {:>12s} {:>12s}".format("scheme", "verif/s", "ms/verif"))
+    for scheme in password_hash.SCHEMES:
+        try:
+            rate = verifications_per_second(scheme, seconds)
+        except ValueError as e:
+            print("{:15s} {}".format(scheme, e))
+            continue
+        print("{:15s} {:12.1f} {:12.3f}".format(scheme, rate, 1000 / rate))
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+""" Per-request cost of Auth.require_auth with many excluded paths: the
+former linear scan over the pattern list against the compiled PathMatcher
+
+Usage: python3 -m benchmarks.require_auth [number_of_patterns]
+"""
+from api.v1.auth.auth import Auth, PathMatcher
+from typing import List
+import sys
+import timeit
+
+
+def linear_require_auth(path: str, excluded_paths: List[str]) -> bool:
+    """ require_auth as it was before PathMatcher """
+    if path is None:
+        return True
+    if not excluded_paths:
+        return True
+    for pattern in excluded_paths:
+        if pattern.endswith('*'):
+            if path.startswith(pattern[:-1]):
+                return False
+        elif pattern == path or pattern == f'{path}/':
+            return False
+
+    return True
+
+
+def patterns(count: int) -> List[str]:
+    """ count excluded paths, one wildcard pattern out of four """
+    result = []
+    for i in range(count):
+        if i % 4 == 0:
+            result.append('/api/v1/public{}/*'.format(i))
+        else:
+            result.append('/api/v1/open{}/'.format(i))
+    return result
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    number = 20000
+    excluded_paths = patterns(count)
+    matcher = PathMatcher(excluded_paths)
+    auth = Auth()
+    # worst case for the scan: a protected path matching no pattern
+    path = '/api/v1/users/me'
+
+    linear = timeit.timeit(lambda: linear_require_auth(path, excluded_paths),
+                           number=number)
+    compiled = timeit.timeit(lambda: auth.require_auth(path, matcher),
+                             number=number)
+    print("patterns:      {:d}".format(count))
+    print("linear scan:   {:.2f} us/request".format(linear / number * 1e6))
+    print("PathMatcher:   {:.2f} us/request".format(compiled / number * 1e6))
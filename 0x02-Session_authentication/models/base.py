@@ -1,28 +1,45 @@
 #!/usr/bin/env python3
 """ Base module
 """
+from collections import OrderedDict
 from datetime import datetime
 from typing import TypeVar, List, Iterable
-from os import path
-import json
+from os import getenv
+from operator import attrgetter
+from models.engine import storage
+import threading
 import uuid
 
 
 TIMESTAMP_FORMAT = "%Y-%m-%dT%H:%M:%S"
-DATA = {}
+JSON_CACHE_SIZE = int(getenv('JSON_CACHE_SIZE', 1024))
+# id(obj) -> (obj, updated_at serialized, public to_json() of obj), least
+# recently used first
+JSON_CACHE = OrderedDict()
+JSON_CACHE_LOCK = threading.Lock()
 
 
 class Base():
     """ Base class
+
+    Models declare their attributes in __slots__: instances carry no
+    per-object __dict__, which matters with every user held in memory
     """
+    __slots__ = ('id', 'created_at', 'updated_at')
+    _indexed_attributes = ()
+    _datetime_fields = ('created_at', 'updated_at')
+    storage_mode = getenv('DB_STORAGE_MODE', 'snapshot')
+    journal_compact_every = int(getenv('DB_JOURNAL_COMPACT_EVERY', 1000))
+    fsync_policy = getenv('DB_FSYNC', 'always')
+    fsync_batch = int(getenv('DB_FSYNC_BATCH', 100))
+    write_behind = getenv('DB_WRITE_BEHIND', '0') == '1'
+    flush_interval = int(getenv('DB_FLUSH_INTERVAL', 50)) / 1000
+    flush_max_writes = int(getenv('DB_FLUSH_MAX_WRITES', 100))
+    lazy_load = getenv('DB_LAZY_LOAD', '0') == '1'
 
     def __init__(self, *args: list, **kwargs: dict):
         """ Initialize a Base instance
         """
-        s_class = str(self.__class__.__name__)
-        if DATA.get(s_class) is None:
-            DATA[s_class] = {}
-
         self.id = kwargs.get('id', str(uuid.uuid4()))
         if kwargs.get('created_at') is not None:
             self.created_at = datetime.strptime(kwargs.get('created_at'),
@@ -44,69 +61,124 @@ class Base():
             return False
         return (self.id == other.id)
 
+    @classmethod
+    def _fields(cls) -> tuple:
+        """ Names of all the persisted slots of the class, base class
+        ones first
+        """
+        fields = cls.__dict__.get('_field_names')
+        if fields is None:
+            fields = tuple(name for klass in reversed(cls.__mro__)
+                           for name in klass.__dict__.get('__slots__', ()))
+            cls._field_names = fields
+        return fields
+
+    @classmethod
+    def _serializer(cls, for_serialization: bool):
+        """ Function turning an instance into its JSON dictionary, built
+        once per class and mode
+        """
+        name = '_full_serializer' if for_serialization \
+            else '_public_serializer'
+        serializer = cls.__dict__.get(name)
+        if serializer is not None:
+            return serializer
+
+        keys = tuple(key for key in cls._fields()
+                     if for_serialization or key[0] != '_')
+        getter = attrgetter(*keys)
+        dates = tuple(key for key in keys if key in cls._datetime_fields)
+
+        def serializer(obj: Base) -> dict:
+            result = dict(zip(keys, getter(obj)))
+            for key in dates:
+                value = result[key]
+                if type(value) is datetime:
+                    result[key] = value.strftime(TIMESTAMP_FORMAT)
+            return result
+
+        setattr(cls, name, staticmethod(serializer))
+        return serializer
+
     def to_json(self, for_serialization: bool = False) -> dict:
         """ Convert the object a JSON dictionary
+
+        The public form (what the API returns) of the JSON_CACHE_SIZE
+        most recently serialized objects is cached until their next
+        save(). An entry records the updated_at it was serialized with,
+        read first: one computed while a save() ran is never served. The
+        full form, only written by the storage, is never cached: a cache
+        entry per stored object would double the memory held per user
         """
-        result = {}
-        for key, value in self.__dict__.items():
-            if not for_serialization and key[0] == '_':
-                continue
-            if type(value) is datetime:
-                result[key] = value.strftime(TIMESTAMP_FORMAT)
-            else:
-                result[key] = value
-        return result
+        if for_serialization or JSON_CACHE_SIZE <= 0:
+            return self._serializer(for_serialization)(self)
+        key = id(self)
+        updated_at = self.updated_at
+        with JSON_CACHE_LOCK:
+            entry = JSON_CACHE.get(key)
+            if entry is not None and entry[1] == updated_at:
+                JSON_CACHE.move_to_end(key)
+                return dict(entry[2])
+        result = self._serializer(False)(self)
+        with JSON_CACHE_LOCK:
+            JSON_CACHE[key] = (self, updated_at, result)
+            while len(JSON_CACHE) > JSON_CACHE_SIZE:
+                JSON_CACHE.popitem(last=False)
+        return dict(result)
 
     @classmethod
     def load_from_file(cls):
-        """ Load all objects from file
+        """ Load all objects from the storage
         """
-        s_class = cls.__name__
-        file_path = ".db_{}.json".format(s_class)
-        DATA[s_class] = {}
-        if not path.exists(file_path):
-            return
-
-        with open(file_path, 'r') as f:
-            objs_json = json.load(f)
-            for obj_id, obj_json in objs_json.items():
-                DATA[s_class][obj_id] = cls(**obj_json)
+        storage.load(cls)
 
     @classmethod
     def save_to_file(cls):
         """ Save all objects to file
         """
-        s_class = cls.__name__
-        file_path = ".db_{}.json".format(s_class)
-        objs_json = {}
-        for obj_id, obj in DATA[s_class].items():
-            objs_json[obj_id] = obj.to_json(True)
+        storage.save_to_file(cls)
 
-        with open(file_path, 'w') as f:
-            json.dump(objs_json, f)
+    @classmethod
+    def compact(cls):
+        """ Fold the incremental journal into the snapshot
+        """
+        storage.compact(cls)
+
+    @classmethod
+    def flush(cls):
+        """ Write every pending (write-behind) mutation
+        """
+        storage.flush()
 
     def save(self):
         """ Save current object
         """
-        s_class = self.__class__.__name__
         self.updated_at = datetime.utcnow()
-        DATA[s_class][self.id] = self
-        self.__class__.save_to_file()
+        with JSON_CACHE_LOCK:
+            JSON_CACHE.pop(id(self), None)
+        storage.save(self)
 
     def remove(self):
         """ Remove object
         """
-        s_class = self.__class__.__name__
-        if DATA[s_class].get(self.id) is not None:
-            del DATA[s_class][self.id]
-            self.__class__.save_to_file()
+        with JSON_CACHE_LOCK:
+            JSON_CACHE.pop(id(self), None)
+        storage.remove(self)
+
+    @classmethod
+    def remove_many(cls, objs: List[TypeVar('Base')]) -> int:
+        """ Remove several objects with a single write to the storage
+        """
+        with JSON_CACHE_LOCK:
+            for obj in objs:
+                JSON_CACHE.pop(id(obj), None)
+        return storage.remove_many(cls, objs)
 
     @classmethod
     def count(cls) -> int:
         """ Count all objects
         """
-        s_class = cls.__name__
-        return len(DATA[s_class].keys())
+        return storage.count(cls)
 
     @classmethod
     def all(cls) -> Iterable[TypeVar('Base')]:
@@ -118,20 +190,18 @@ class Base():
     def get(cls, id: str) -> TypeVar('Base'):
         """ Return one object by ID
         """
-        s_class = cls.__name__
-        return DATA[s_class].get(id)
+        return storage.get(cls, id)
+
+    @classmethod
+    def page(cls, after_id: str = None,
+             limit: int = 100) -> List[TypeVar('Base')]:
+        """ Return at most limit objects ordered by ID, starting after
+        after_id
+        """
+        return storage.page(cls, after_id, limit)
 
     @classmethod
     def search(cls, attributes: dict = {}) -> List[TypeVar('Base')]:
         """ Search all objects with matching attributes
         """
-        s_class = cls.__name__
-        def _search(obj):
-            if len(attributes) == 0:
-                return True
-            for k, v in attributes.items():
-                if (getattr(obj, k) != v):
-                    return False
-            return True
-        
-        return list(filter(_search, DATA[s_class].values()))
+        return storage.search(cls, attributes)
@@ -0,0 +1,13 @@
+#!/usr/bin/env python3
+""" Storage engine selected by STORAGE_TYPE
+"""
+from os import getenv
+
+storage = None
+STORAGE_TYPE = getenv("STORAGE_TYPE", "file")
+if STORAGE_TYPE == "sqlite":
+    from models.engine.sqlite_storage import SQLiteStorage
+    storage = SQLiteStorage()
+else:
+    from models.engine.file_storage import FileStorage
+    storage = FileStorage()
@@ -0,0 +1,496 @@
+#!/usr/bin/env python3
+""" FileStorage module: in-memory objects persisted to JSON files
+"""
+from typing import TypeVar, List
+from os import path
+from models.engine.storage import Storage
+import atexit
+import bisect
+import json
+import mmap
+import os
+import threading
+
+
+DATA = {}
+INDEXES = {}
+INDEXED_VALUES = {}
+SORTED_IDS = {}
+JOURNAL_SIZES = {}
+UNSYNCED_WRITES = {}
+PENDING_WRITES = {}
+FLUSH_CONDITION = threading.Condition()
+WRITE_LOCK = threading.RLock()
+LOCKS = {}
+
+
+class LazyRecord():
+    """ Placeholder kept in DATA for an object not materialized yet:
+    where its line lives in the snapshot, and its indexed values
+    """
+    __slots__ = ('loc', 'values')
+
+    def __init__(self, loc: tuple, values: dict):
+        """ loc is (mmap, offset, length), swapped in one assignment
+        """
+        self.loc = loc
+        self.values = values
+
+
+class FileStorage(Storage):
+    """ Keeps every object in DATA and persists each class to
+    .db_<Class>.json (plus .db_<Class>.journal in 'journal' mode)
+
+    The persistence knobs (storage_mode, fsync_policy, write_behind...)
+    are read from the model class
+
+    In lazy_load mode the snapshot is line-delimited (.db_<Class>.jsonl):
+    load() only maps the file and records the offset of each object, which
+    is parsed into an instance the first time it is accessed
+    """
+
+    def __init__(self):
+        """ Initialize the storage
+        """
+        self._flusher = None
+        atexit.register(self.flush)
+
+    @staticmethod
+    def _lock(cls: type) -> threading.RLock:
+        """ Per-class writer lock
+
+        Mutations of DATA and of the indexes hold it; readers never do,
+        they iterate over copies taken in one step instead
+        """
+        return LOCKS.setdefault(cls.__name__, threading.RLock())
+
+    def _objects(self, cls: type) -> dict:
+        """ Objects of cls by ID, created empty on first use
+        """
+        s_class = cls.__name__
+        if DATA.get(s_class) is None:
+            with self._lock(cls):
+                if DATA.get(s_class) is None:
+                    self._rebuild_indexes(cls, {})
+                    SORTED_IDS[s_class] = []
+                    DATA[s_class] = {}
+        return DATA[s_class]
+
+    def load(self, cls: type):
+        """ Load all objects from file: the snapshot, then the journal
+        records appended since the last compaction
+        """
+        s_class = cls.__name__
+        file_path = ".db_{}.json".format(s_class)
+        lines_path = ".db_{}.jsonl".format(s_class)
+        with self._lock(cls):
+            self._objects(cls)
+            objs = {}
+            if cls.lazy_load and path.exists(lines_path):
+                self._map_lines(cls, lines_path, objs)
+            elif path.exists(file_path):
+                with open(file_path, 'r') as f:
+                    objs_json = json.load(f)
+                    for obj_id, obj_json in objs_json.items():
+                        objs[obj_id] = cls(**obj_json)
+            elif path.exists(lines_path):
+                with open(lines_path, 'r') as f:
+                    for line in f:
+                        obj = cls(**json.loads(line))
+                        objs[obj.id] = obj
+            with WRITE_LOCK:
+                JOURNAL_SIZES[s_class] = self._replay_journal(cls, objs)
+            self._rebuild_indexes(cls, objs)
+            DATA[s_class] = objs
+            SORTED_IDS[s_class] = sorted(objs)
+
+    @staticmethod
+    def _map_lines(cls: type, lines_path: str, objs: dict):
+        """ Fill objs with a LazyRecord per line of the snapshot
+        """
+        with open(lines_path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        offset = 0
+        size = len(mm)
+        while offset < size:
+            end = mm.find(b"\n", offset)
+            if end == -1:
+                end = size
+            if end == offset:
+                offset += 1
+                continue
+            obj_json = json.loads(mm[offset:end])
+            values = {attr: obj_json.get(attr)
+                      for attr in cls._indexed_attributes}
+            objs[obj_json['id']] = LazyRecord((mm, offset, end - offset),
+                                              values)
+            offset = end + 1
+
+    def _materialize(self, cls: type, obj_id: str, entry):
+        """ Instance for a DATA entry, parsing it if it is a LazyRecord
+        """
+        if type(entry) is not LazyRecord:
+            return entry
+        mm, offset, length = entry.loc
+        obj = cls(**json.loads(mm[offset:offset + length]))
+        with self._lock(cls):
+            objs = self._objects(cls)
+            if objs.get(obj_id) is entry:
+                objs[obj_id] = obj
+                return obj
+            return objs.get(obj_id)
+
+    def _replay_journal(self, cls: type, objs: dict) -> int:
+        """ Apply the journal records on top of the loaded snapshot,
+        return the number of records applied
+        """
+        journal_path = ".db_{}.journal".format(cls.__name__)
+        applied = 0
+        if not path.exists(journal_path):
+            return applied
+
+        with open(journal_path, 'r') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # torn last record of a crashed append
+                    break
+                if record.get('op') == 'save':
+                    obj = cls(**record['obj'])
+                    objs[obj.id] = obj
+                elif record.get('op') == 'remove':
+                    objs.pop(record.get('id'), None)
+                applied += 1
+        return applied
+
+    def save_to_file(self, cls: type):
+        """ Save all objects to file
+        """
+        s_class = cls.__name__
+        file_path = ".db_{}.json".format(s_class)
+        lines_path = ".db_{}.jsonl".format(s_class)
+        objs = self._objects(cls).copy()
+        if cls.lazy_load:
+            file_path, stale_path = lines_path, file_path
+        else:
+            stale_path = lines_path
+
+        tmp_path = "{}.{}.tmp".format(file_path, os.getpid())
+        with WRITE_LOCK:
+            with open(tmp_path, 'wb' if cls.lazy_load else 'w') as f:
+                if cls.lazy_load:
+                    remapped = self._write_lines(f, objs)
+                else:
+                    remapped = []
+                    json.dump({obj_id: obj.to_json(True)
+                               for obj_id, obj in objs.items()}, f)
+                synced = self._sync(cls, f)
+            os.replace(tmp_path, file_path)
+            if synced:
+                self._sync_dir(file_path)
+            if path.exists(stale_path):
+                os.remove(stale_path)
+            if remapped:
+                with open(file_path, 'rb') as f:
+                    mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                for entry, offset, length in remapped:
+                    entry.loc = (mm, offset, length)
+
+    @staticmethod
+    def _write_lines(f, objs: dict) -> list:
+        """ Write one JSON line per object, copying the bytes of objects
+        never materialized; return their (entry, offset, length) in f
+        """
+        remapped = []
+        offset = 0
+        for obj in objs.values():
+            if type(obj) is LazyRecord:
+                mm, start, length = obj.loc
+                line = mm[start:start + length]
+                remapped.append((obj, offset, length))
+            else:
+                line = json.dumps(obj.to_json(True)).encode()
+            f.write(line + b"\n")
+            offset += len(line) + 1
+        return remapped
+
+    @staticmethod
+    def _sync(cls: type, f, force: bool = False) -> bool:
+        """ fsync an open file according to the fsync policy:
+        'always' syncs every write, 'batched' every fsync_batch writes
+        (or when forced), 'never' leaves it to the OS
+        """
+        if cls.fsync_policy == 'never':
+            return False
+        s_class = cls.__name__
+        pending = UNSYNCED_WRITES.get(s_class, 0) + 1
+        if cls.fsync_policy == 'batched' and not force and \
+                pending < cls.fsync_batch:
+            UNSYNCED_WRITES[s_class] = pending
+            return False
+
+        f.flush()
+        os.fsync(f.fileno())
+        UNSYNCED_WRITES[s_class] = 0
+        return True
+
+    @staticmethod
+    def _sync_dir(file_path: str):
+        """ fsync the directory holding file_path so a rename is durable
+        """
+        fd = os.open(path.dirname(path.abspath(file_path)), os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    def compact(self, cls: type):
+        """ Fold the journal into a fresh snapshot and truncate it
+        """
+        s_class = cls.__name__
+        with WRITE_LOCK:
+            if cls.fsync_policy == 'batched':
+                # the snapshot must be on disk before the journal goes away
+                UNSYNCED_WRITES[s_class] = cls.fsync_batch
+            self.save_to_file(cls)
+            journal_path = ".db_{}.journal".format(s_class)
+            if path.exists(journal_path):
+                open(journal_path, 'w').close()
+            JOURNAL_SIZES[s_class] = 0
+
+    def _persist(self, cls: type, record: dict):
+        """ Persist one mutation, right away or - in write-behind mode -
+        by queuing it for the background flusher
+        """
+        if not cls.write_behind:
+            with WRITE_LOCK:
+                self._write(cls, [record])
+            return
+
+        with FLUSH_CONDITION:
+            records = PENDING_WRITES.setdefault(cls.__name__, (cls, []))[1]
+            records.append(record)
+            self._start_flusher()
+            if len(records) == 1 or len(records) >= cls.flush_max_writes:
+                FLUSH_CONDITION.notify()
+
+    def _write(self, cls: type, records: List[dict]):
+        """ Write a batch of mutations: rewrite the snapshot once in
+        'snapshot' mode, append them to the journal in 'journal' mode
+        """
+        if cls.storage_mode != 'journal':
+            self.save_to_file(cls)
+            return
+
+        s_class = cls.__name__
+        journal_path = ".db_{}.journal".format(s_class)
+        with open(journal_path, 'a') as f:
+            f.write("".join(json.dumps(r) + "\n" for r in records))
+            self._sync(cls, f)
+        JOURNAL_SIZES[s_class] = JOURNAL_SIZES.get(s_class, 0) + len(records)
+        if JOURNAL_SIZES[s_class] >= cls.journal_compact_every:
+            self.compact(cls)
+
+    def flush(self):
+        """ Write every mutation queued by write-behind saves
+        """
+        with WRITE_LOCK:
+            with FLUSH_CONDITION:
+                pending = list(PENDING_WRITES.values())
+                PENDING_WRITES.clear()
+            for cls, records in pending:
+                self._write(cls, records)
+
+    def _start_flusher(self):
+        """ Start the background flusher thread once
+        """
+        if self._flusher is not None:
+            return
+        self._flusher = threading.Thread(target=self._flush_loop,
+                                         name="storage-flusher", daemon=True)
+        self._flusher.start()
+
+    def _flush_loop(self):
+        """ Group commit: once a write is queued, wait for the flush
+        window (or until flush_max_writes writes are queued) then flush
+        """
+        while True:
+            with FLUSH_CONDITION:
+                while not PENDING_WRITES:
+                    FLUSH_CONDITION.wait()
+                FLUSH_CONDITION.wait(min(cls.flush_interval for cls, _
+                                         in PENDING_WRITES.values()))
+            self.flush()
+
+    def save(self, obj: TypeVar('Base')):
+        """ Save obj
+        """
+        cls = obj.__class__
+        with self._lock(cls):
+            objs = self._objects(cls)
+            if obj.id not in objs:
+                bisect.insort(SORTED_IDS[cls.__name__], obj.id)
+            objs[obj.id] = obj
+            self._index(cls, obj)
+            self._persist(cls, {'op': 'save', 'obj': obj.to_json(True)})
+
+    def remove(self, obj: TypeVar('Base')):
+        """ Remove obj
+        """
+        cls = obj.__class__
+        with self._lock(cls):
+            objs = self._objects(cls)
+            if objs.get(obj.id) is not None:
+                del objs[obj.id]
+                ids = SORTED_IDS[cls.__name__]
+                del ids[bisect.bisect_left(ids, obj.id)]
+                self._unindex(cls, obj.id)
+                self._persist(cls, {'op': 'remove', 'id': obj.id})
+
+    def remove_many(self, cls: type, objs: List[TypeVar('Base')]) -> int:
+        """ Remove several objects with a single write: one snapshot, which
+        also compacts the journal in 'journal' mode
+        """
+        with self._lock(cls):
+            stored = self._objects(cls)
+            removed = []
+            for obj in objs:
+                if stored.pop(obj.id, None) is not None:
+                    self._unindex(cls, obj.id)
+                    removed.append(obj.id)
+            if not removed:
+                return 0
+            SORTED_IDS[cls.__name__] = [obj_id for obj_id
+                                        in SORTED_IDS[cls.__name__]
+                                        if obj_id in stored]
+            if cls.write_behind:
+                for obj_id in removed:
+                    self._persist(cls, {'op': 'remove', 'id': obj_id})
+            elif cls.storage_mode == 'journal':
+                self.compact(cls)
+            else:
+                self.save_to_file(cls)
+        return len(removed)
+
+    def count(self, cls: type) -> int:
+        """ Count all objects
+        """
+        return len(self._objects(cls))
+
+    def get(self, cls: type, id: str) -> TypeVar('Base'):
+        """ Return one object by ID
+        """
+        return self._materialize(cls, id, self._objects(cls).get(id))
+
+    def page(self, cls: type, after_id: str = None,
+             limit: int = 100) -> List[TypeVar('Base')]:
+        """ At most limit objects ordered by ID, starting after after_id
+        """
+        objs = self._objects(cls)
+        ids = SORTED_IDS[cls.__name__]
+        start = 0 if after_id is None else bisect.bisect_right(ids, after_id)
+        found = (self._materialize(cls, obj_id, objs.get(obj_id))
+                 for obj_id in ids[start:start + limit])
+        return list(filter(None, found))
+
+    def _rebuild_indexes(self, cls: type, objs: dict):
+        """ Rebuild every declared index of cls from objs
+        """
+        indexes = {attr: {} for attr in cls._indexed_attributes}
+        indexed_values = {}
+        with self._lock(cls):
+            for obj_id, obj in objs.items():
+                self._index_into(cls, obj_id, obj, indexes, indexed_values)
+            INDEXES[cls.__name__] = indexes
+            INDEXED_VALUES[cls.__name__] = indexed_values
+
+    def _index(self, cls: type, obj: TypeVar('Base')):
+        """ Add (or refresh) an object in the declared indexes
+        """
+        if not cls._indexed_attributes:
+            return
+        s_class = cls.__name__
+        self._unindex(cls, obj.id)
+        self._index_into(cls, obj.id, obj, INDEXES[s_class],
+                         INDEXED_VALUES[s_class])
+
+    @staticmethod
+    def _index_into(cls: type, obj_id: str, obj: TypeVar('Base'),
+                    indexes: dict, indexed_values: dict):
+        """ Record the indexed attribute values of obj
+        """
+        if type(obj) is LazyRecord:
+            return FileStorage._index_values(obj_id, obj.values, indexes,
+                                             indexed_values)
+        values = {attr: getattr(obj, attr, None)
+                  for attr in cls._indexed_attributes}
+        FileStorage._index_values(obj_id, values, indexes, indexed_values)
+
+    @staticmethod
+    def _index_values(obj_id: str, values: dict, indexes: dict,
+                      indexed_values: dict):
+        """ Record obj_id under each of its indexed values
+        """
+        indexed = {}
+        for attr, value in values.items():
+            try:
+                indexes[attr].setdefault(value, {})[obj_id] = None
+            except TypeError:
+                continue
+            indexed[attr] = value
+        indexed_values[obj_id] = indexed
+
+    def _unindex(self, cls: type, obj_id: str):
+        """ Drop an object from the declared indexes
+        """
+        s_class = cls.__name__
+        values = INDEXED_VALUES.get(s_class, {}).pop(obj_id, None)
+        if values is None:
+            return
+        for attr, value in values.items():
+            ids = INDEXES[s_class][attr].get(value)
+            if ids is None:
+                continue
+            ids.pop(obj_id, None)
+            if len(ids) == 0:
+                del INDEXES[s_class][attr][value]
+
+    def search(self, cls: type,
+               attributes: dict = {}) -> List[TypeVar('Base')]:
+        """ Search all objects with matching attributes
+
+        Equality on an indexed attribute is resolved with a dict lookup,
+        only the (small) candidate set is then checked attribute by attribute
+        """
+        s_class = cls.__name__
+        objs = self._objects(cls)
+
+        def _search(obj):
+            if len(attributes) == 0:
+                return True
+            for k, v in attributes.items():
+                if (getattr(obj, k) != v):
+                    return False
+            return True
+
+        candidates = None
+        for k, v in attributes.items():
+            if k not in cls._indexed_attributes:
+                continue
+            try:
+                ids = tuple(INDEXES[s_class][k].get(v, ()))
+            except TypeError:
+                continue
+            if candidates is None or len(ids) < len(candidates):
+                candidates = ids
+        if candidates is None:
+            entries = tuple(objs.items())
+        else:
+            entries = tuple((obj_id, objs.get(obj_id))
+                            for obj_id in candidates)
+        found = (self._materialize(cls, obj_id, entry)
+                 for obj_id, entry in entries if entry is not None)
+        return list(filter(_search, filter(None, found)))
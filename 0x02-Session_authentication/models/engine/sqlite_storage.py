@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+""" SQLiteStorage module: objects stored in one SQLite database
+shared by every process of the API
+"""
+from typing import TypeVar, List
+from os import getenv, path
+from models.engine.storage import Storage
+import json
+import os
+import sqlite3
+import threading
+
+
+class SQLiteStorage(Storage):
+    """ One table per model class: (id TEXT PRIMARY KEY, data TEXT), data
+    being the to_json(True) document of the object. Every indexed
+    attribute of the class gets an index on json_extract(data, '$.attr')
+
+    The database runs in WAL mode so readers of every worker process
+    never block on the (single) writer
+    """
+
+    def __init__(self, db_path: str = None):
+        """ Initialize the storage
+        """
+        self.db_path = db_path or getenv('SQLITE_DB_PATH', '.db.sqlite3')
+        self.busy_timeout = int(getenv('SQLITE_BUSY_TIMEOUT', 5000))
+        self._local = threading.local()
+        self._tables = set()
+        self._tables_lock = threading.Lock()
+
+    @property
+    def _connection(self) -> sqlite3.Connection:
+        """ Connection of the current thread (a forked worker never reuses
+        the connection of its parent)
+        """
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.db_path, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout={:d}".format(self.busy_timeout))
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _table(self, cls: type) -> str:
+        """ Quoted table name of cls, created (with its indexes) on first use
+        """
+        s_class = cls.__name__
+        table = '"{}"'.format(s_class)
+        if s_class in self._tables:
+            return table
+
+        with self._tables_lock:
+            if s_class not in self._tables:
+                conn = self._connection
+                conn.execute("CREATE TABLE IF NOT EXISTS {} "
+                             "(id TEXT PRIMARY KEY, data TEXT NOT NULL)"
+                             .format(table))
+                for attr in cls._indexed_attributes:
+                    conn.execute("CREATE INDEX IF NOT EXISTS "
+                                 "\"ix_{0}_{1}\" ON {2} "
+                                 "(json_extract(data, '$.{1}'))"
+                                 .format(s_class, attr, table))
+                self._tables.add(s_class)
+        return table
+
+    def load(self, cls: type):
+        """ Create the table of cls; on first run, import the objects of
+        an existing .db_<Class>.json store
+        """
+        table = self._table(cls)
+        file_path = ".db_{}.json".format(cls.__name__)
+        if self.count(cls) > 0 or not path.exists(file_path):
+            return
+
+        with open(file_path, 'r') as f:
+            objs_json = json.load(f)
+        rows = [(obj_id, json.dumps(obj_json))
+                for obj_id, obj_json in objs_json.items()]
+        with self._connection as conn:
+            conn.execute("BEGIN")
+            conn.executemany("INSERT OR IGNORE INTO {} (id, data) "
+                             "VALUES (?, ?)".format(table), rows)
+
+    def save(self, obj: TypeVar('Base')):
+        """ Insert or replace obj
+        """
+        table = self._table(obj.__class__)
+        self._connection.execute(
+            "INSERT OR REPLACE INTO {} (id, data) VALUES (?, ?)"
+            .format(table), (obj.id, json.dumps(obj.to_json(True))))
+
+    def remove(self, obj: TypeVar('Base')):
+        """ Delete obj
+        """
+        table = self._table(obj.__class__)
+        self._connection.execute("DELETE FROM {} WHERE id = ?"
+                                 .format(table), (obj.id,))
+
+    def remove_many(self, cls: type, objs: List[TypeVar('Base')]) -> int:
+        """ Delete several objects in one transaction
+        """
+        table = self._table(cls)
+        ids = [obj.id for obj in objs]
+        removed = 0
+        with self._connection as conn:
+            conn.execute("BEGIN")
+            for i in range(0, len(ids), 500):
+                chunk = ids[i:i + 500]
+                cursor = conn.execute(
+                    "DELETE FROM {} WHERE id IN ({})"
+                    .format(table, ", ".join("?" * len(chunk))), chunk)
+                removed += cursor.rowcount
+        return removed
+
+    def count(self, cls: type) -> int:
+        """ Count all objects
+        """
+        table = self._table(cls)
+        row = self._connection.execute("SELECT COUNT(*) FROM {}"
+                                       .format(table)).fetchone()
+        return row[0]
+
+    def get(self, cls: type, id: str) -> TypeVar('Base'):
+        """ Return one object by ID
+        """
+        table = self._table(cls)
+        row = self._connection.execute("SELECT data FROM {} WHERE id = ?"
+                                       .format(table), (id,)).fetchone()
+        if row is None:
+            return None
+        return cls(**json.loads(row[0]))
+
+    def page(self, cls: type, after_id: str = None,
+             limit: int = 100) -> List[TypeVar('Base')]:
+        """ At most limit objects ordered by ID, starting after after_id
+        """
+        table = self._table(cls)
+        rows = self._connection.execute(
+            "SELECT data FROM {} WHERE id > ? ORDER BY id LIMIT ?"
+            .format(table), (after_id or "", limit))
+        return [cls(**json.loads(row[0])) for row in rows]
+
+    def search(self, cls: type,
+               attributes: dict = {}) -> List[TypeVar('Base')]:
+        """ Search all objects with matching attributes
+
+        Scalar values are matched in SQL (through the json_extract indexes
+        for indexed attributes), anything else is checked on the objects
+        """
+        table = self._table(cls)
+        clauses = []
+        params = []
+        remaining = {}
+        for k, v in attributes.items():
+            if k.isidentifier() and \
+                    (v is None or isinstance(v, (str, int, float))):
+                clauses.append("json_extract(data, '$.{}') IS ?".format(k))
+                params.append(v)
+            else:
+                remaining[k] = v
+
+        query = "SELECT data FROM {}".format(table)
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        objs = [cls(**json.loads(row[0]))
+                for row in self._connection.execute(query, params)]
+        if not remaining:
+            return objs
+        return [obj for obj in objs
+                if all(getattr(obj, k) == v for k, v in remaining.items())]
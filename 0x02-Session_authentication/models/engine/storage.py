@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+""" Storage module: interface of the model storage engines
+"""
+from typing import TypeVar, List
+
+
+class Storage():
+    """ Template for every storage engine behind models.base.Base
+
+    Every method receives the model class (or instance) it works on
+    """
+
+    def load(self, cls: type):
+        """ Load (or open) the objects of cls
+        """
+        raise NotImplementedError
+
+    def save_to_file(self, cls: type):
+        """ Write a full snapshot of the objects of cls, if the engine
+        has such a thing
+        """
+        pass
+
+    def compact(self, cls: type):
+        """ Fold any incremental log of cls into its snapshot
+        """
+        pass
+
+    def flush(self):
+        """ Write every pending mutation
+        """
+        pass
+
+    def save(self, obj: TypeVar('Base')):
+        """ Insert or update obj
+        """
+        raise NotImplementedError
+
+    def remove(self, obj: TypeVar('Base')):
+        """ Delete obj
+        """
+        raise NotImplementedError
+
+    def remove_many(self, cls: type, objs: List[TypeVar('Base')]) -> int:
+        """ Delete several objects of cls, return how many were deleted
+        """
+        for obj in objs:
+            self.remove(obj)
+        return len(objs)
+
+    def count(self, cls: type) -> int:
+        """ Number of objects of cls
+        """
+        raise NotImplementedError
+
+    def get(self, cls: type, id: str) -> TypeVar('Base'):
+        """ Object of cls with this ID, or None
+        """
+        raise NotImplementedError
+
+    def page(self, cls: type, after_id: str = None,
+             limit: int = 100) -> List[TypeVar('Base')]:
+        """ At most limit objects of cls ordered by ID, starting after
+        after_id (from the first one when None)
+        """
+        raise NotImplementedError
+
+    def search(self, cls: type,
+               attributes: dict = {}) -> List[TypeVar('Base')]:
+        """ Objects of cls whose attributes equal all of attributes
+        """
+        raise NotImplementedError
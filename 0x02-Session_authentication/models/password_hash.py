@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+""" Password hashing schemes of the User model
+
+Stored hashes name their scheme, so hashes of every scheme can live
+side by side (and be moved between services):
+  - sha256 (legacy): 64 hex digits, unsalted - what User always stored
+  - bcrypt: $2b$<rounds>$<salt+hash> - what the user authentication
+    service stores (needs the bcrypt package)
+  - pbkdf2_sha256: pbkdf2_sha256$<iterations>$<salt>$<hash>
+  - scrypt: scrypt$<n>$<r>$<p>$<salt>$<hash>
+
+PASSWORD_SCHEME selects the scheme of new hashes (default:
+pbkdf2_sha256). sha256 is only ever verified: a login never rewrites
+a hash into a weaker scheme than the one it is stored with
+"""
+from base64 import b64decode, b64encode
+from os import getenv
+import hashlib
+import hmac
+import os
+try:
+    import bcrypt
+except ImportError:
+    bcrypt = None
+
+PASSWORD_SCHEME = getenv('PASSWORD_SCHEME', 'pbkdf2_sha256')
+BCRYPT_ROUNDS = int(getenv('BCRYPT_ROUNDS', 12))
+PBKDF2_ITERATIONS = int(getenv('PBKDF2_ITERATIONS', 600000))
+SCRYPT_N = int(getenv('SCRYPT_N', 2 ** 14))
+SCRYPT_R = int(getenv('SCRYPT_R', 8))
+SCRYPT_P = int(getenv('SCRYPT_P', 1))
+
+# weakest first: a hash is only rehashed into a stronger scheme
+SCHEMES = ('sha256', 'pbkdf2_sha256', 'bcrypt', 'scrypt')
+
+
+def _b64(data: bytes) -> str:
+    """ base64 of bytes, as text """
+    return b64encode(data).decode('ascii')
+
+
+def identify(hashed: str) -> str:
+    """ Scheme of a stored hash, None if it is not recognized
+    """
+    if not isinstance(hashed, str):
+        return None
+    if hashed.startswith(('$2a$', '$2b$', '$2y$')):
+        return 'bcrypt'
+    scheme = hashed.split('$', 1)[0]
+    if scheme in ('pbkdf2_sha256', 'scrypt') and '$' in hashed:
+        return scheme
+    if len(hashed) == 64 and all(c in '0123456789abcdef' for c in hashed):
+        return 'sha256'
+    return None
+
+
+def hash_password(pwd: str, scheme: str = None) -> str:
+    """ Hash of a password with scheme (default: PASSWORD_SCHEME)
+    """
+    scheme = scheme or PASSWORD_SCHEME
+    pwd_e = pwd.encode()
+    if scheme == 'sha256':
+        return hashlib.sha256(pwd_e).hexdigest().lower()
+    if scheme == 'bcrypt':
+        if bcrypt is None:
+            raise ValueError("the bcrypt scheme needs the bcrypt package")
+        return bcrypt.hashpw(pwd_e, bcrypt.gensalt(BCRYPT_ROUNDS)).decode()
+    salt = os.urandom(16)
+    if scheme == 'pbkdf2_sha256':
+        digest = hashlib.pbkdf2_hmac('sha256', pwd_e, salt, PBKDF2_ITERATIONS)
+        return "pbkdf2_sha256${}${}${}".format(
+            PBKDF2_ITERATIONS, _b64(salt), _b64(digest))
+    if scheme == 'scrypt':
+        digest = _scrypt(pwd_e, salt, SCRYPT_N, SCRYPT_R, SCRYPT_P)
+        return "scrypt${}${}${}${}${}".format(SCRYPT_N, SCRYPT_R, SCRYPT_P,
+                                              _b64(salt), _b64(digest))
+    raise ValueError("unknown password scheme: {}".format(scheme))
+
+
+def _scrypt(pwd: bytes, salt: bytes, n: int, r: int, p: int) -> bytes:
+    """ 32-byte scrypt digest """
+    return hashlib.scrypt(pwd, salt=salt, n=n, r=r, p=p,
+                          maxmem=256 * n * r + 1024 * 1024, dklen=32)
+
+
+def verify_password(pwd: str, hashed: str) -> bool:
+    """ Whether pwd matches a stored hash of any scheme
+    """
+    scheme = identify(hashed)
+    pwd_e = pwd.encode()
+    try:
+        if scheme == 'sha256':
+            computed = hashlib.sha256(pwd_e).hexdigest().lower()
+            return hmac.compare_digest(computed, hashed)
+        if scheme == 'bcrypt':
+            return bcrypt is not None and \
+                bcrypt.checkpw(pwd_e, hashed.encode())
+        if scheme == 'pbkdf2_sha256':
+            _, iterations, salt, digest = hashed.split('$')
+            computed = hashlib.pbkdf2_hmac('sha256', pwd_e, b64decode(salt),
+                                           int(iterations))
+            return hmac.compare_digest(computed, b64decode(digest))
+        if scheme == 'scrypt':
+            _, n, r, p, salt, digest = hashed.split('$')
+            computed = _scrypt(pwd_e, b64decode(salt), int(n), int(r), int(p))
+            return hmac.compare_digest(computed, b64decode(digest))
+    except ValueError:
+        return False
+    return False
+
+
+def needs_update(hashed: str) -> bool:
+    """ Whether a stored hash should be replaced on the next login:
+    its scheme is weaker than PASSWORD_SCHEME, or it is PASSWORD_SCHEME
+    with another cost
+    """
+    scheme = identify(hashed)
+    if scheme is None or PASSWORD_SCHEME not in SCHEMES:
+        return False
+    if scheme != PASSWORD_SCHEME:
+        return SCHEMES.index(scheme) < SCHEMES.index(PASSWORD_SCHEME)
+    if scheme == 'bcrypt':
+        return hashed.split('$')[2] != "{:02d}".format(BCRYPT_ROUNDS)
+    if scheme == 'pbkdf2_sha256':
+        return hashed.split('$')[1] != str(PBKDF2_ITERATIONS)
+    if scheme == 'scrypt':
+        return hashed.split('$')[1:4] != \
+            [str(SCRYPT_N), str(SCRYPT_R), str(SCRYPT_P)]
+    return False
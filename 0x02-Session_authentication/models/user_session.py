@@ -5,12 +5,20 @@ from models.base import Base
 
 
 class UserSession(Base):
-    """User session class that inherits from Base"""
+    """User session class that inherits from Base
+
+    A session is stored under its session ID, so looking it up is a
+    plain get() whatever the storage engine
+    """
+    __slots__ = ('user_id', 'session_id')
+    _indexed_attributes = ('session_id', 'user_id')
 
     def __init__(self, *args: list, **kwargs: dict):
         """Initialize the UserSession instance
         """
 
+        if kwargs.get('id') is None and kwargs.get('session_id'):
+            kwargs['id'] = kwargs.get('session_id')
         super().__init__(*args, **kwargs)
         self.user_id = kwargs.get('user_id')
         self.session_id = kwargs.get('session_id')
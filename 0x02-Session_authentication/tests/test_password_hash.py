@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+""" Tests of the password hashing schemes and of upgrade-on-login
+
+Run from the 0x02-Session_authentication directory:
+    python3 -m pytest tests
+"""
+from models import password_hash
+from models.user import User
+import pytest
+
+
+@pytest.fixture
+def fast_costs(monkeypatch):
+    """ Cheap costs, so that the tests hash quickly """
+    monkeypatch.setattr(password_hash, 'BCRYPT_ROUNDS', 4)
+    monkeypatch.setattr(password_hash, 'PBKDF2_ITERATIONS', 1000)
+    monkeypatch.setattr(password_hash, 'SCRYPT_N', 2 ** 4)
+
+
+def login(monkeypatch, hashed: str, pwd: str) -> User:
+    """ User with a stored hash, after is_valid_password(pwd) """
+    user = User(_password=hashed)
+    monkeypatch.setattr(User, 'save', lambda self: None)
+    assert user.is_valid_password(pwd)
+    return user
+
+
+def test_default_scheme_is_salted():
+    """ New hashes are salted by default """
+    assert password_hash.PASSWORD_SCHEME != 'sha256'
+
+
+@pytest.mark.parametrize('target', password_hash.SCHEMES)
+def test_bcrypt_never_rewritten_as_sha256(monkeypatch, fast_costs, target):
+    """ A bcrypt hash is never replaced by a weaker scheme on login """
+    pytest.importorskip('bcrypt')
+    monkeypatch.setattr(password_hash, 'PASSWORD_SCHEME', target)
+    hashed = password_hash.hash_password('pw', 'bcrypt')
+    user = login(monkeypatch, hashed, 'pw')
+    assert password_hash.identify(user.password) in ('bcrypt', 'scrypt')
+    if target != 'scrypt':
+        assert user.password == hashed
+
+
+@pytest.mark.parametrize('target', password_hash.SCHEMES[1:])
+def test_sha256_upgraded(monkeypatch, fast_costs, target):
+    """ A legacy sha256 hash is replaced by PASSWORD_SCHEME on login """
+    if target == 'bcrypt':
+        pytest.importorskip('bcrypt')
+    monkeypatch.setattr(password_hash, 'PASSWORD_SCHEME', target)
+    user = login(monkeypatch, password_hash.hash_password('pw', 'sha256'),
+                 'pw')
+    assert password_hash.identify(user.password) == target
+    assert user.is_valid_password('pw')
+
+
+def test_sha256_target_rewrites_nothing(monkeypatch, fast_costs):
+    """ With PASSWORD_SCHEME=sha256, no salted hash is rewritten """
+    monkeypatch.setattr(password_hash, 'PASSWORD_SCHEME', 'sha256')
+    for scheme in ('pbkdf2_sha256', 'scrypt'):
+        hashed = password_hash.hash_password('pw', scheme)
+        assert not password_hash.needs_update(hashed)
+
+
+def test_same_scheme_other_cost(monkeypatch, fast_costs):
+    """ A hash of PASSWORD_SCHEME with another cost is replaced """
+    monkeypatch.setattr(password_hash, 'PASSWORD_SCHEME', 'pbkdf2_sha256')
+    hashed = password_hash.hash_password('pw')
+    assert not password_hash.needs_update(hashed)
+    monkeypatch.setattr(password_hash, 'PBKDF2_ITERATIONS', 2000)
+    assert password_hash.needs_update(hashed)
+    user = login(monkeypatch, hashed, 'pw')
+    assert user.password.split('$')[1] == '2000'
+
+
+def test_wrong_password(fast_costs):
+    """ A wrong password is rejected and leaves the hash as it is """
+    hashed = password_hash.hash_password('pw', 'sha256')
+    user = User(_password=hashed)
+    assert not user.is_valid_password('other')
+    assert user.password == hashed
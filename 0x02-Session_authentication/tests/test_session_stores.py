@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+""" Tests shared by every SessionStore backend
+
+Run from the 0x02-Session_authentication directory:
+    python3 -m pytest tests
+"""
+from datetime import datetime, timedelta
+from api.v1.auth.session_store import MemorySessionStore
+from api.v1.auth.sqlite_session_store import SQLiteSessionStore
+from api.v1.auth.mmap_session_store import MmapSessionStore
+import os
+import pytest
+
+
+def memory_store(tmp_path, duration, max_sessions):
+    """ MemorySessionStore, no reaper thread """
+    return MemorySessionStore(duration, max_sessions, 0)
+
+
+def sqlite_store(tmp_path, duration, max_sessions):
+    """ SQLiteSessionStore in a temporary file, no reaper thread """
+    return SQLiteSessionStore(duration, max_sessions, 0,
+                              str(tmp_path / "sessions.sqlite3"))
+
+
+def mmap_store(tmp_path, duration, max_sessions):
+    """ MmapSessionStore in a temporary file, no reaper thread """
+    return MmapSessionStore(duration, max_sessions, 0,
+                            str(tmp_path / "sessions.mmap"))
+
+
+ALL_STORES = [memory_store, sqlite_store, mmap_store]
+SHARED_STORES = [sqlite_store, mmap_store]
+
+
+def session(user_id: str, age: int = 0) -> dict:
+    """ Session dictionary created age seconds ago """
+    return {
+        'user_id': user_id,
+        'created_at': datetime.now() - timedelta(seconds=age),
+    }
+
+
+def in_child(check) -> int:
+    """ Exit status of check() run in a forked process (0: success) """
+    pid = os.fork()
+    if pid == 0:
+        try:
+            check()
+            code = 0
+        except BaseException:
+            code = 1
+        os._exit(code)
+    return os.waitstatus_to_exitcode(os.waitpid(pid, 0)[1])
+
+
+@pytest.fixture(params=ALL_STORES, ids=lambda f: f.__name__)
+def make_store(request, tmp_path):
+    """ Factory of a store of each backend """
+    return lambda duration=60, max_sessions=0: \
+        request.param(tmp_path, duration, max_sessions)
+
+
+@pytest.fixture(params=SHARED_STORES, ids=lambda f: f.__name__)
+def make_shared_store(request, tmp_path):
+    """ Factory of a store of each backend shared between processes """
+    return lambda duration=60, max_sessions=0: \
+        request.param(tmp_path, duration, max_sessions)
+
+
+def test_set_get(make_store):
+    """ Session dictionaries and bare user IDs are returned as stored """
+    store = make_store()
+    created = session('u1')
+    store['s1'] = created
+    store['s2'] = 'u2'
+    assert store['s1']['user_id'] == 'u1'
+    assert abs(store['s1']['created_at'] - created['created_at']) \
+        < timedelta(seconds=1)
+    assert store.get('s2') == 'u2'
+    assert 's1' in store
+    assert len(store) == 2
+
+
+def test_get_unknown(make_store):
+    """ Unknown sessions give the default or KeyError """
+    store = make_store()
+    assert store.get('nope') is None
+    assert store.get('nope', 'default') == 'default'
+    assert 'nope' not in store
+    with pytest.raises(KeyError):
+        store['nope']
+
+
+def test_replace(make_store):
+    """ Storing a session ID again replaces the session """
+    store = make_store()
+    store['s1'] = session('u1')
+    store['s1'] = session('u2')
+    assert store['s1']['user_id'] == 'u2'
+    assert len(store) == 1
+
+
+def test_delete(make_store):
+    """ Deleted sessions are gone, unknown ones raise KeyError """
+    store = make_store()
+    store['s1'] = session('u1')
+    del store['s1']
+    assert 's1' not in store
+    assert len(store) == 0
+    with pytest.raises(KeyError):
+        del store['s1']
+
+
+def test_oversized_id(make_store):
+    """ An ID longer than any stored one is unknown, not an error """
+    store = make_store()
+    session_id = 'x' * 100
+    assert store.get(session_id) is None
+    assert session_id not in store
+    with pytest.raises(KeyError):
+        del store[session_id]
+
+
+def test_expiry(make_store):
+    """ A session older than the duration is dropped when read """
+    store = make_store(duration=60)
+    store['old'] = session('u1', age=120)
+    store['new'] = session('u2', age=30)
+    assert store.get('old') is None
+    assert store['new']['user_id'] == 'u2'
+    assert store.stats()['expired'] == 1
+
+
+def test_no_expiry(make_store):
+    """ A duration of 0 keeps sessions forever """
+    store = make_store(duration=0)
+    store['old'] = session('u1', age=10 ** 6)
+    assert store['old']['user_id'] == 'u1'
+    assert store.reap() == 0
+
+
+def test_max_sessions(make_store):
+    """ Above max_sessions, the sessions closest to expiry are evicted """
+    store = make_store(max_sessions=4)
+    for i in range(4):
+        store['s{}'.format(i)] = session('u', age=50 - i)
+    store['s4'] = session('u')
+    store['s5'] = session('u')
+    assert len(store) == 4
+    assert 's0' not in store and 's1' not in store
+    assert all('s{}'.format(i) in store for i in range(2, 6))
+    assert store.stats()['evicted'] == 2
+
+
+def test_reap(make_store):
+    """ reap() drops every expired session and only those """
+    store = make_store(duration=60)
+    for i in range(10):
+        store['old{}'.format(i)] = session('u', age=120)
+        store['new{}'.format(i)] = session('u')
+    assert store.reap() == 10
+    assert len(store) == 10
+    assert all('new{}'.format(i) in store for i in range(10))
+    assert store.reap() == 0
+
+
+def test_stats(make_store):
+    """ stats() reports live, expired and evicted sessions """
+    store = make_store(duration=60, max_sessions=3)
+    store['old'] = session('u', age=120)
+    assert store.get('old') is None
+    for i in range(4):
+        store['s{}'.format(i)] = session('u', age=10 - i)
+    assert store.stats() == {'live': 3, 'expired': 1, 'evicted': 1}
+    assert 's0' not in store
+
+
+def test_visible_across_fork(make_shared_store):
+    """ Sessions written by a forked worker are seen by its parent, and
+    the other way round
+    """
+    store = make_shared_store()
+    store['parent'] = session('p')
+
+    def child():
+        assert store['parent']['user_id'] == 'p'
+        store['child'] = session('c')
+        del store['parent']
+
+    assert in_child(child) == 0
+    assert store['child']['user_id'] == 'c'
+    assert 'parent' not in store
+    assert in_child(lambda: store['child']) == 0
+
+
+def test_reopened_by_another_store(make_shared_store):
+    """ A store opened on the same file sees the same sessions """
+    store = make_shared_store()
+    store['s1'] = session('u1')
+    assert make_shared_store()['s1']['user_id'] == 'u1'
@@ -4,12 +4,31 @@ This module contains the flask app
 """
 from flask import Flask, jsonify, request, abort, redirect
 from auth import Auth
+from hashing import HashingBusy
 
 app = Flask(__name__)
 
 AUTH = Auth()
 
 
+@app.errorhandler(HashingBusy)
+def too_many_requests(error) -> str:
+    """
+    Password hashing pool saturated handler
+    """
+    response = jsonify({"message": "too many requests, retry later"})
+    response.headers['Retry-After'] = '1'
+    return response, 429
+
+
+@app.teardown_appcontext
+def close_db_session(exception) -> None:
+    """
+    Release the database session of the request
+    """
+    AUTH.close_db_session()
+
+
 @app.route('/', methods=['GET'])
 def home():
     return jsonify({"message": "Bienvenue"})
@@ -106,6 +125,8 @@ def update_password() -> str:
     try:
         AUTH.update_password(reset_token, new_password)
         return jsonify({'email': email, 'message': 'Password updated'}), 200
+    except HashingBusy:
+        raise
     except Exception:
         abort(403)
 
@@ -2,21 +2,26 @@
 """
 This module contains _hash_password method
 """
+import logging
 import uuid
 from sqlalchemy.orm.exc import NoResultFound
 from db import DB
+from hashing import BCRYPT_ROUNDS, POOL, HashingBusy, bcrypt_rounds
+from session_cache import SessionCache, SessionUser
 from user import User
-import bcrypt
 
 
 def _hash_password(password: str) -> bytes:
     """
-    Securely hashing a user's password
+    Securely hashing a user's password, with BCRYPT_ROUNDS rounds
 
     Returns:
         salted hash of the input password
+
+    Raises:
+        HashingBusy: the hashing pool is saturated
     """
-    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt())
+    return POOL.hash(password.encode('utf-8'), BCRYPT_ROUNDS)
 
 
 def _generate_uuid() -> str:
@@ -32,6 +37,7 @@ class Auth:
 
     def __init__(self):
         self._db = DB()
+        self.session_cache = SessionCache()
 
     def register_user(self, email: str, password: str) -> User:
         """
@@ -53,15 +59,42 @@ class Auth:
     def valid_login(self, email: str, password: str) -> bool:
         """
         Handle login attempts
+
+        A hash made with another cost than BCRYPT_ROUNDS is replaced on
+        a successful login, so changing the cost migrates every user
+        who logs in.
+
+        Raises:
+            HashingBusy: the hashing pool is saturated
         """
         try:
             user = self._db.find_user_by(email=email)
-            if bcrypt.checkpw(password.encode('utf-8'), user.hashed_password):
-                return True
+            valid = POOL.check(password.encode('utf-8'), user.hashed_password)
+        except HashingBusy:
+            raise
         except Exception as e:
-            pass
+            return False
 
-        return False
+        if valid:
+            self._rehash_password(user, password)
+        return valid
+
+    def _rehash_password(self, user: User, password: str) -> None:
+        """
+        Replace the hash of a user when its cost is not BCRYPT_ROUNDS
+
+        Never fails the login: when the hashing pool is saturated or the
+        update fails, the hash is left for a later login
+        """
+        if bcrypt_rounds(user.hashed_password) == BCRYPT_ROUNDS:
+            return
+        try:
+            hashed_password = _hash_password(password)
+            self._db.update_user(user.id, hashed_password=hashed_password)
+        except Exception as e:
+            self._db._session.rollback()
+            logging.getLogger(__name__).warning(
+                "password rehash failed for user %s: %r", user.id, e)
 
     def create_session(self, email: str) -> str:
         """
@@ -70,24 +103,39 @@ class Auth:
         session_id = _generate_uuid()
         try:
             user = self._db.find_user_by(email=email)
+            generation = self.session_cache.invalidate_user(user.id)
             user.session_id = session_id
             self._db._session.commit()
+            self.session_cache.put(session_id,
+                                   SessionUser(user.id, user.email),
+                                   generation)
             return session_id
         except Exception as e:
             pass
 
-    def get_user_from_session_id(self, session_id: str) -> str:
+    def get_user_from_session_id(self, session_id: str) -> SessionUser:
         """
-        Retrieving user information based on a provided session ID
+        Retrieving user information based on a provided session ID,
+        from the session cache when possible
+
+        Returns:
+            SessionUser: id and email of the user
         """
         if session_id is None:
             return None
 
+        user = self.session_cache.get(session_id)
+        if user is not None:
+            return user
+
+        generation = self.session_cache.generation
         try:
             user = self._db.find_user_by(session_id=session_id)
         except NoResultFound:
             return None
 
+        user = SessionUser(user.id, user.email)
+        self.session_cache.put(session_id, user, generation)
         return user
 
     def destroy_session(self, user_id: str) -> None:
@@ -98,8 +146,15 @@ class Auth:
         if user_id is None:
             return None
 
+        self.session_cache.invalidate_user(user_id)
         self._db.update_user(user_id, session_id=None)
 
+    def close_db_session(self) -> None:
+        """
+        Release the database session of the current request
+        """
+        self._db.remove_session()
+
     def get_reset_password_token(self, email: str) -> str:
         """method to generate a reset password token for user
         Args:  email address of the user
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Latency of DB.find_user_by on a large users table, with the indexes of
+the User model and without them (full table scans)
+
+Usage: ./bench_find_user_by.py [number_of_users]  (default: 1000000)
+
+The benchmark fills its own database, bench_find_user_by.db, deleted
+when it ends: the service database (DB_URL) is never touched.
+"""
+import os
+import sys
+import time
+import uuid
+from sqlalchemy import text
+from db import DB
+from user import User
+
+LOOKUPS = 200
+BENCH_DB = "bench_find_user_by.db"
+
+
+def fill(db: DB, count: int) -> list:
+    """
+    Insert count users, return a sample of them as (email, session_id,
+    reset_token)
+    """
+    sample = []
+    batch = []
+    for i in range(count):
+        row = {
+            "email": f"user{i}@example.com",
+            "hashed_password": "x",
+            "session_id": str(uuid.uuid4()),
+            "reset_token": str(uuid.uuid4()),
+        }
+        batch.append(row)
+        if i % (count // LOOKUPS or 1) == 0:
+            sample.append((row["email"], row["session_id"],
+                           row["reset_token"]))
+        if len(batch) == 10000:
+            db._session.execute(User.__table__.insert(), batch)
+            batch = []
+    if batch:
+        db._session.execute(User.__table__.insert(), batch)
+    db._session.commit()
+    return sample[:LOOKUPS]
+
+
+def lookup_time(db: DB, column: str, values: list) -> float:
+    """
+    Average time of find_user_by(column=value), in milliseconds
+    """
+    start = time.perf_counter()
+    for value in values:
+        db.find_user_by(**{column: value})
+        db._session.expunge_all()
+    return (time.perf_counter() - start) * 1000 / len(values)
+
+
+def report(db: DB, sample: list, label: str, repeat: int = 1) -> None:
+    """
+    Print the lookup time of each indexed column, for repeat users
+    spread over the table
+    """
+    step = max(len(sample) // repeat, 1)
+    for position, column in enumerate(("email", "session_id",
+                                       "reset_token")):
+        values = [row[position] for row in sample[::step]][:repeat]
+        print("{:10s} {:12s} {:10.3f} ms".format(
+            label, column, lookup_time(db, column, values)))
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    files = [BENCH_DB + suffix for suffix in ("", "-wal", "-shm")]
+    for file in files:
+        if os.path.exists(file):
+            os.remove(file)
+    db = DB(url=f"sqlite:///{BENCH_DB}")
+    try:
+        print(f"inserting {count} users...")
+        sample = fill(db, count)
+        report(db, sample, "indexed", LOOKUPS)
+
+        for index in User.__table__.indexes:
+            db._session.execute(text(f"DROP INDEX {index.name}"))
+        db._session.commit()
+        report(db, sample, "no index", 5)
+    finally:
+        db.remove_session()
+        db._engine.dispose()
+        for file in files:
+            if os.path.exists(file):
+                os.remove(file)
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+Pick the bcrypt cost (BCRYPT_ROUNDS) for this machine
+
+Usage: ./calibrate_bcrypt.py [target_ms]
+
+Prints the time of one password check for each cost, and the highest
+cost whose check stays under target_ms milliseconds (default: 250).
+"""
+import sys
+import time
+import bcrypt
+
+PASSWORD = b'calibration password'
+
+
+def check_time(rounds: int, runs: int = 3) -> float:
+    """
+    Best time of a bcrypt check at the given cost, in milliseconds
+    """
+    hashed_password = bcrypt.hashpw(PASSWORD, bcrypt.gensalt(rounds))
+    best = None
+    for _ in range(runs):
+        start = time.perf_counter()
+        bcrypt.checkpw(PASSWORD, hashed_password)
+        elapsed = (time.perf_counter() - start) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def calibrate(target_ms: float) -> int:
+    """
+    Highest cost whose check takes at most target_ms (4 at least)
+    """
+    rounds = 4
+    for cost in range(4, 32):
+        elapsed = check_time(cost)
+        print("rounds={:2d}  {:9.1f} ms".format(cost, elapsed))
+        if elapsed > target_ms:
+            break
+        rounds = cost
+    return rounds
+
+
+if __name__ == '__main__':
+    target_ms = float(sys.argv[1]) if len(sys.argv) > 1 else 250
+    print("BCRYPT_ROUNDS={}".format(calibrate(target_ms)))
@@ -1,37 +1,132 @@
 #!/usr/bin/env python3
 """DB module
 """
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from functools import partial
+from os import getenv
+import os
+from sqlalchemy import create_engine, event, inspect
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import scoped_session, sessionmaker
 from sqlalchemy.orm.session import Session
-from sqlalchemy.exc import InvalidRequestError
+from sqlalchemy.pool import QueuePool
+from sqlalchemy.exc import IntegrityError, InvalidRequestError
 from sqlalchemy.orm.exc import NoResultFound
-# from typing import Dict, Any
+from typing import List
 
 from user import Base
 from user import User
 
+DB_URL = getenv('DB_URL', 'sqlite:///a.db')
+DB_POOL_SIZE = int(getenv('DB_POOL_SIZE', 5))
+DB_MAX_OVERFLOW = int(getenv('DB_MAX_OVERFLOW', 10))
+DB_BUSY_TIMEOUT = int(getenv('DB_BUSY_TIMEOUT', 5000))
+
+# Version of the schema declared by the models: bump it whenever they
+# change, so that existing databases get migrated on the next start
+SCHEMA_VERSION = 1
+
+# Columns update_user and update_users may set
+USER_COLUMNS = frozenset(User.__table__.columns.keys())
+
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record) -> None:
+    """
+    Configure each new SQLite connection: WAL journal, so readers never
+    wait on the writer, and a busy timeout instead of immediate
+    "database is locked" errors
+    """
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA busy_timeout={:d}".format(DB_BUSY_TIMEOUT))
+    cursor.close()
+
 
 class DB:
     """DB class
+
+    Each thread (so each request) gets its own session from a scoped
+    session registry, over a pool of DB_POOL_SIZE connections (plus
+    DB_MAX_OVERFLOW extra ones under load) checked before use.
+    remove_session() must be called when a request ends.
+
+    The database (DB_URL) persists across restarts: its schema is
+    created or migrated when its version is not SCHEMA_VERSION.
     """
 
-    def __init__(self) -> None:
+    def __init__(self, url: str = None) -> None:
         """Initialize a new DB instance
         """
-        self._engine = create_engine("sqlite:///a.db", echo=False)
-        Base.metadata.drop_all(self._engine)
+        url = make_url(url or DB_URL)
+        self._sqlite = url.get_backend_name() == "sqlite"
+        options = {}
+        if self._sqlite:
+            options["connect_args"] = {"check_same_thread": False}
+        self._engine = create_engine(
+            url, echo=False,
+            poolclass=QueuePool,
+            pool_size=DB_POOL_SIZE,
+            max_overflow=DB_MAX_OVERFLOW,
+            pool_pre_ping=True,
+            **options)
+        if self._sqlite:
+            event.listen(self._engine, "connect", _set_sqlite_pragmas)
+        # a forked worker must not reuse the connections of its parent
+        os.register_at_fork(
+            after_in_child=partial(self._engine.dispose, close=False))
+        self._ensure_schema()
+        self.__session = scoped_session(
+            sessionmaker(bind=self._engine, expire_on_commit=False))
+
+    def _schema_version(self) -> int:
+        """
+        Schema version recorded in the database (SQLite user_version),
+        None when the database cannot record one
+        """
+        if not self._sqlite:
+            return None
+        with self._engine.connect() as conn:
+            return conn.exec_driver_sql("PRAGMA user_version").scalar()
+
+    def _ensure_schema(self) -> None:
+        """
+        Create the missing tables and indexes, unless the database is
+        already at SCHEMA_VERSION (one PRAGMA read, no reflection)
+        """
+        if self._schema_version() == SCHEMA_VERSION:
+            return
         Base.metadata.create_all(self._engine)
-        self.__session = None
+        self._migrate()
+        if self._sqlite:
+            with self._engine.begin() as conn:
+                conn.exec_driver_sql(
+                    "PRAGMA user_version={:d}".format(SCHEMA_VERSION))
+
+    def _migrate(self) -> None:
+        """
+        Create the indexes missing from tables made by an older version
+        (create_all only creates missing tables)
+        """
+        inspector = inspect(self._engine)
+        for table in Base.metadata.sorted_tables:
+            existing = {index['name']
+                        for index in inspector.get_indexes(table.name)}
+            for index in table.indexes:
+                if index.name not in existing:
+                    index.create(self._engine)
 
     @property
     def _session(self) -> Session:
-        """Memoized session object
+        """Session of the current thread
+        """
+        return self.__session()
+
+    def remove_session(self) -> None:
+        """
+        Close the session of the current thread, giving its connection
+        back to the pool
         """
-        if self.__session is None:
-            DBSession = sessionmaker(bind=self._engine)
-            self.__session = DBSession()
-        return self.__session
+        self.__session.remove()
 
     def add_user(self, email: str, hashed_password: str) -> User:
         """
@@ -43,10 +138,17 @@ class DB:
 
         Returns:
             User: The newly created user.
+
+        Raises:
+            ValueError: a user with this email already exists
         """
         new_user = User(email=email, hashed_password=hashed_password)
         self._session.add(new_user)
-        self._session.commit()
+        try:
+            self._session.commit()
+        except IntegrityError:
+            self._session.rollback()
+            raise ValueError(f"User {email} already exists")
         return new_user
 
     def find_user_by(self, **kwargs) -> User:
@@ -69,13 +171,37 @@ class DB:
 
     def update_user(self, user_id: int, **kwargs) -> None:
         """
-        updating an existing user's information in the database
+        updating an existing user's information in the database,
+        in a single UPDATE statement
+
+        Raises:
+            ValueError: a key is not a column of the users table
+            NoResultFound: no user has this id
         """
-        user = self.find_user_by(id=user_id)
-        for key, value in kwargs.items():
-            if hasattr(user, key):
-                setattr(user, key, value)
-            else:
-                raise ValueError
+        if self.update_users([user_id], **kwargs) == 0:
+            raise NoResultFound
+
+    def update_users(self, user_ids: List[int], **kwargs) -> int:
+        """
+        Set the same values on several users in a single UPDATE
+        statement
 
-        self._session.commit()
+        Returns:
+            int: number of users updated
+
+        Raises:
+            ValueError: a key is not a column of the users table, or
+            the update breaks a unique index
+        """
+        if not USER_COLUMNS.issuperset(kwargs):
+            raise ValueError
+        query = self._session.query(User).filter(User.id.in_(user_ids))
+        if not kwargs:
+            return query.count()
+        try:
+            updated = query.update(kwargs)
+            self._session.commit()
+        except IntegrityError:
+            self._session.rollback()
+            raise ValueError
+        return updated
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+This module runs the bcrypt work of the service in a process pool
+"""
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from os import getenv
+import multiprocessing
+import os
+import threading
+import bcrypt
+
+HASH_WORKERS = int(getenv('HASH_WORKERS', os.cpu_count() or 1))
+HASH_QUEUE_SIZE = int(getenv('HASH_QUEUE_SIZE', 2 * HASH_WORKERS))
+HASH_QUEUE_TIMEOUT = float(getenv('HASH_QUEUE_TIMEOUT', 0))
+BCRYPT_ROUNDS = int(getenv('BCRYPT_ROUNDS', 12))
+
+
+class HashingBusy(Exception):
+    """
+    Raised when every slot of the hashing pool is taken
+    """
+
+
+def bcrypt_hash(password: bytes, rounds: int = BCRYPT_ROUNDS) -> bytes:
+    """
+    Salted bcrypt hash of a password (runs in a worker process)
+    """
+    return bcrypt.hashpw(password, bcrypt.gensalt(rounds))
+
+
+def bcrypt_check(password: bytes, hashed_password: bytes) -> bool:
+    """
+    Whether a password matches a bcrypt hash (runs in a worker process)
+    """
+    return bcrypt.checkpw(password, hashed_password)
+
+
+def bcrypt_rounds(hashed_password: bytes) -> int:
+    """
+    Cost factor of a bcrypt hash ($2b$<rounds>$...), None if unreadable
+    """
+    if isinstance(hashed_password, str):
+        hashed_password = hashed_password.encode('utf-8')
+    try:
+        return int(hashed_password.split(b'$')[2])
+    except (IndexError, ValueError):
+        return None
+
+
+class HashingPool:
+    """
+    Process pool for the CPU-bound password work
+
+    At most queue_size jobs are running or waiting at once: a request
+    arriving when every slot is taken waits up to timeout seconds for
+    one, then gets HashingBusy, so logins can never pile up and starve
+    the request threads serving every other endpoint.
+    """
+
+    def __init__(self, workers: int = HASH_WORKERS,
+                 queue_size: int = HASH_QUEUE_SIZE,
+                 timeout: float = HASH_QUEUE_TIMEOUT) -> None:
+        """
+        Initialize the pool (worker processes start on first use)
+        """
+        self.workers = workers
+        self.queue_size = max(queue_size, 1)
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(self.queue_size)
+        self._lock = threading.Lock()
+        self._executor = None
+        self._pid = None
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        """
+        Executor of the current process (a forked worker starts its own),
+        whose workers are started by a forkserver: they only need
+        bcrypt_hash and bcrypt_check
+        """
+        if self._executor is None or self._pid != os.getpid():
+            with self._lock:
+                if self._executor is None or self._pid != os.getpid():
+                    # created from a request thread: forking this
+                    # multi-threaded process could deadlock the workers
+                    self._executor = ProcessPoolExecutor(
+                        self.workers,
+                        mp_context=multiprocessing.get_context(
+                            'forkserver'))
+                    self._pid = os.getpid()
+        return self._executor
+
+    def _replace_executor(self, broken: ProcessPoolExecutor) -> None:
+        """
+        Drop a broken executor (a worker process died), unless another
+        thread already replaced it
+        """
+        with self._lock:
+            if self._executor is broken:
+                self._executor = None
+        broken.shutdown(wait=False)
+
+    def run(self, fn, *args):
+        """
+        Run fn(*args) in the pool and return its result, on a new pool
+        if a worker process of the current one died
+
+        Raises:
+            HashingBusy: no slot freed up within timeout seconds
+        """
+        if self.timeout > 0:
+            acquired = self._slots.acquire(timeout=self.timeout)
+        else:
+            acquired = self._slots.acquire(blocking=False)
+        if not acquired:
+            raise HashingBusy
+        try:
+            executor = self.executor
+            try:
+                return executor.submit(fn, *args).result()
+            except BrokenProcessPool:
+                self._replace_executor(executor)
+                return self.executor.submit(fn, *args).result()
+        finally:
+            self._slots.release()
+
+    def hash(self, password: bytes, rounds: int = BCRYPT_ROUNDS) -> bytes:
+        """
+        Salted bcrypt hash of a password
+        """
+        return self.run(bcrypt_hash, password, rounds)
+
+    def check(self, password: bytes, hashed_password: bytes) -> bool:
+        """
+        Whether a password matches a bcrypt hash
+        """
+        return self.run(bcrypt_check, password, hashed_password)
+
+
+POOL = HashingPool()
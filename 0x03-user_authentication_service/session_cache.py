@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+This module contains the session lookup cache of the Auth service
+"""
+from collections import OrderedDict, namedtuple
+from os import getenv
+import threading
+import time
+
+SESSION_CACHE_SIZE = int(getenv('SESSION_CACHE_SIZE', 10000))
+SESSION_CACHE_TTL = float(getenv('SESSION_CACHE_TTL', 60))
+
+SessionUser = namedtuple('SessionUser', ['id', 'email'])
+
+
+class SessionCache:
+    """
+    LRU cache of session ID -> SessionUser(id, email), entries expiring
+    after ttl seconds
+
+    Auth invalidates entries itself on login and logout. The TTL bounds
+    how long a worker process can keep serving a session closed by
+    another one. A size of 0 disables the cache.
+
+    Every invalidation bumps generation: a lookup read from the
+    database is only cached if no invalidation happened since it
+    started (see put), so a logout racing with a cache miss can never
+    leave the closed session cached.
+    """
+
+    def __init__(self, size: int = SESSION_CACHE_SIZE,
+                 ttl: float = SESSION_CACHE_TTL) -> None:
+        """
+        Initialize an empty cache
+        """
+        self.size = size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.generation = 0
+        self._entries = OrderedDict()
+        self._session_by_user = {}
+        self._lock = threading.Lock()
+
+    def get(self, session_id: str) -> SessionUser:
+        """
+        User of a cached session, None on a miss
+        """
+        with self._lock:
+            entry = self._entries.get(session_id)
+            if entry is not None and entry[1] < time.monotonic():
+                self._drop(session_id)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(session_id)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, session_id: str, user: SessionUser,
+            generation: int) -> None:
+        """
+        Cache the user of a session, read from the database when the
+        cache was at generation (skipped if it was invalidated since)
+        """
+        if self.size <= 0:
+            return
+        with self._lock:
+            if generation != self.generation:
+                return
+            self._drop_user(user.id)
+            self._entries[session_id] = (user, time.monotonic() + self.ttl)
+            self._entries.move_to_end(session_id)
+            self._session_by_user[user.id] = session_id
+            while len(self._entries) > self.size:
+                self._drop(next(iter(self._entries)))
+
+    def invalidate_user(self, user_id: int) -> int:
+        """
+        Forget the cached session of a user
+
+        Returns:
+            int: the new generation of the cache
+        """
+        with self._lock:
+            self._drop_user(user_id)
+            self.generation += 1
+            return self.generation
+
+    def _drop(self, session_id: str) -> None:
+        """
+        Forget a session (lock held)
+        """
+        user, _ = self._entries.pop(session_id)
+        if self._session_by_user.get(user.id) == session_id:
+            del self._session_by_user[user.id]
+
+    def _drop_user(self, user_id: int) -> None:
+        """
+        Forget the session of a user (lock held)
+        """
+        session_id = self._session_by_user.pop(user_id, None)
+        if session_id is not None:
+            self._entries.pop(session_id, None)
+
+    def stats(self) -> dict:
+        """
+        Hit and miss counters, and number of cached sessions
+        """
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'size': len(self._entries),
+        }
@@ -21,10 +21,13 @@ class User(Base):
         hashed_password (str): The user's password.
         session_id (str): The user's session ID.
         reset_token (str): The user's  token.
+
+    email, session_id and reset_token, the columns users are looked up
+    by, have unique indexes.
     """
     __tablename__ = 'users'
     id = Column(Integer, primary_key=True)
-    email = Column(String(250), nullable=False)
+    email = Column(String(250), nullable=False, unique=True, index=True)
     hashed_password = Column(String(250), nullable=False)
-    session_id = Column(String(250), nullable=True)
-    reset_token = Column(String(250), nullable=True)
+    session_id = Column(String(250), nullable=True, unique=True, index=True)
+    reset_token = Column(String(250), nullable=True, unique=True, index=True)